@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class GameengineConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'gameengine'
+
+    def ready(self):
+        # Register signal receivers
+        from gameengine import signals  # noqa: F401
@@ -1,23 +1,110 @@
 """
 WebSocket consumer for the gameengine app.
 """
-from channels.generic.websocket import WebsocketConsumer
-from asgiref.sync import async_to_sync
-import json
-import uuid
-from project.gameengine.gameengine.src.channel_groups import get_user_group_name
+from channels.generic.websocket import AsyncWebsocketConsumer
+import asyncio
+import logging
+import orjson
+from project.gameengine.gameengine.src.channel_groups import (
+    get_anonymous_group_name,
+    get_user_group_name,
+    get_waiting_room_group_name
+)
 
-class ValidateConsumer(WebsocketConsumer):
+logger = logging.getLogger(__name__)
+
+# Envelope used when several frames are flushed in the same event-loop tick
+MULTI_FRAME_PREFIX = '{"message_type":"multi","events":['
+MULTI_FRAME_SUFFIX = ']}'
+
+# Static frames serialized once at import time
+CONNECTION_ESTABLISHED_FRAME = orjson.dumps({
+    'message_type': 'connection_established',
+    'message': 'WebSocket connection established'
+}).decode()
+PONG_FRAME_PREFIX = '{"message_type":"pong","timestamp":'
+
+
+class CoalescingWebsocketConsumer(AsyncWebsocketConsumer):
+    """
+    Async consumer that queues outbound text frames and flushes them once per
+    event-loop tick. A single queued frame is sent unchanged; several frames are
+    wrapped in one `multi` envelope so a burst costs one WebSocket write.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending_frames = []
+        self._flush_scheduled = False
+        self._flush_task = None  # Kept so the running flush is not garbage collected
+    
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        """
+        Queue text frames for the next flush; anything else is sent immediately
+        after the queue is drained so frame ordering is preserved.
+        """
+        if text_data is not None and bytes_data is None and not close:
+            self._pending_frames.append(text_data)
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                asyncio.get_running_loop().call_soon(self._schedule_flush)
+        else:
+            await self._flush_pending()
+            await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
+    
+    async def close(self, code=None):
+        """
+        Drain queued frames before closing the socket.
+        """
+        await self._flush_pending()
+        await super().close(code=code)
+    
+    def _schedule_flush(self):
+        """
+        Run the flush as a task once the current tick's handlers have queued their frames.
+        """
+        self._flush_task = asyncio.ensure_future(self._flush_pending())
+        self._flush_task.add_done_callback(self._on_flush_done)
+    
+    def _on_flush_done(self, task):
+        """
+        Release the finished flush task and log it if it failed.
+        """
+        if self._flush_task is task:
+            self._flush_task = None
+        
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error flushing queued WebSocket frames: {str(task.exception())}")
+    
+    async def _flush_pending(self):
+        """
+        Send all queued frames as a single WebSocket frame.
+        """
+        frames = self._pending_frames
+        self._pending_frames = []
+        self._flush_scheduled = False
+        
+        if len(frames) == 1:
+            await super().send(text_data=frames[0])
+        elif frames:
+            await super().send(text_data=f"{MULTI_FRAME_PREFIX}{','.join(frames)}{MULTI_FRAME_SUFFIX}")
+
+
+class ValidateConsumer(CoalescingWebsocketConsumer):
     """
     Consumer to validate WebSocket connections and handle messages.
     """
     
-    def connect(self):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_group = None
+    
+    async def connect(self):
         """
         Called when the WebSocket is handshaking as part of initial connection.
         """
         # Accept the connection
-        self.accept()
+        await self.accept()
         
         # Get the user from the scope
         user = self.scope.get("user", None)
@@ -26,194 +113,175 @@ class ValidateConsumer(WebsocketConsumer):
         if user and user.is_authenticated:
             # Add to user-specific group
             self.user_group = get_user_group_name(user.id)
-            async_to_sync(self.channel_layer.group_add)(
+            await self.channel_layer.group_add(
                 self.user_group,
                 self.channel_name
             )
         else:
             # Use a unique identifier for anonymous users
-            self.user_group = f"anonymous_{uuid.uuid4().hex}"
-            async_to_sync(self.channel_layer.group_add)(
+            self.user_group = get_anonymous_group_name()
+            await self.channel_layer.group_add(
                 self.user_group,
                 self.channel_name
             )
         
         # Send a connection confirmation message
-        self.send(text_data=json.dumps({
-            'message_type': 'connection_established',
-            'message': 'WebSocket connection established'
-        }))
+        await self.send(text_data=CONNECTION_ESTABLISHED_FRAME)
     
-    def disconnect(self, close_code):
+    async def disconnect(self, close_code):
         """
         Called when the WebSocket closes for any reason.
         """
         # Leave the user group
-        if hasattr(self, 'user_group'):
-            async_to_sync(self.channel_layer.group_discard)(
+        if self.user_group is not None:
+            await self.channel_layer.group_discard(
                 self.user_group,
                 self.channel_name
             )
     
-    def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         """
         Called when we get a text frame from the client.
         """
         # Parse the received JSON
         try:
-            text_data_json = json.loads(text_data)
+            text_data_json = orjson.loads(text_data)
             message = text_data_json.get('message', '')
             
             # Echo the message back to the client
-            self.send(text_data=json.dumps({
+            await self.send(text_data=orjson.dumps({
                 'type': 'echo_message',
                 'message': f"Echo: {message}"
-            }))
-        except json.JSONDecodeError:
-            self.send(text_data=json.dumps({
+            }).decode())
+        except orjson.JSONDecodeError:
+            await self.send(text_data=orjson.dumps({
                 'type': 'error',
                 'message': 'Invalid JSON format'
-            }))
+            }).decode())
     
-    def validation_message(self, event):
+    async def validation_message(self, event):
         """
         Handler for validation_message event.
         """
         # Send the validation message to the WebSocket
-        self.send(text_data=json.dumps({
+        await self.send(text_data=orjson.dumps({
             'message_type': 'validation',
             'message': event['message'],
             'user_id': event.get('user_id'),
             'timestamp': event.get('timestamp')
-        }))
+        }).decode())
 
 
-class WaitingRoomConsumer(WebsocketConsumer):
+class WaitingRoomConsumer(CoalescingWebsocketConsumer):
     """
     Consumer for waiting room WebSocket connections.
     Handles real-time updates for waiting room state.
     """
     
-    def connect(self):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.game_id = None
+        self.user_group = None
+        self.waiting_room_group = None
+    
+    async def connect(self):
         """
         Called when the WebSocket is handshaking as part of initial connection.
         """
-        # Accept the connection
-        self.accept()
-        
         # Get the user from the scope
         user = self.scope.get("user", None)
         
-        # Get the URL path components to extract game_id
-        path = self.scope['path']
-        import re
-        match = re.search(r'waitingroom/([0-9a-f-]+)', path)
+        # The URL router has already captured game_id from the path
+        self.game_id = self.scope['url_route']['kwargs'].get('game_id')
         
-        if not match:
-            # Invalid URL format
-            self.close(code=4000)
-            return
+        # Reject invalid URLs and unauthenticated users during the handshake,
+        # before accept(), so the client gets an HTTP 403 and no WebSocket frames
+        if not self.game_id:
+            await self.close(code=4000)
+        elif not (user and user.is_authenticated):
+            await self.close(code=4001)
+        else:
+            # Accept the connection
+            await self.accept()
             
-        # Extract game_id from the path
-        self.game_id = match.group(1)
-        
-        # Add the user to appropriate groups
-        if user and user.is_authenticated:
-            # Add to user-specific group
+            # Add to user-specific and waiting room groups in one round of awaits
             self.user_group = get_user_group_name(user.id)
-            async_to_sync(self.channel_layer.group_add)(
-                self.user_group,
-                self.channel_name
-            )
-            
-            # Add to waiting room group
-            from project.gameengine.gameengine.src.channel_groups import get_waiting_room_group_name
             self.waiting_room_group = get_waiting_room_group_name(self.game_id)
-            async_to_sync(self.channel_layer.group_add)(
-                self.waiting_room_group,
-                self.channel_name
+            await asyncio.gather(
+                self.channel_layer.group_add(self.user_group, self.channel_name),
+                self.channel_layer.group_add(self.waiting_room_group, self.channel_name)
             )
             
             # Send a connection confirmation message
-            self.send(text_data=json.dumps({
+            await self.send(text_data=orjson.dumps({
                 'message_type': 'connection_established',
                 'message': 'Waiting room WebSocket connection established',
                 'game_id': self.game_id
-            }))
-        else:
-            # Close connection for unauthenticated users
-            self.close(code=4001)
+            }).decode())
     
-    def disconnect(self, close_code):
+    async def disconnect(self, close_code):
         """
         Called when the WebSocket closes for any reason.
         """
-        # Leave the user group
-        if hasattr(self, 'user_group'):
-            async_to_sync(self.channel_layer.group_discard)(
-                self.user_group,
-                self.channel_name
-            )
-        
-        # Leave the waiting room group
-        if hasattr(self, 'waiting_room_group'):
-            async_to_sync(self.channel_layer.group_discard)(
-                self.waiting_room_group,
-                self.channel_name
-            )
+        # Leave the user and waiting room groups concurrently
+        group_discards = []
+        if self.user_group is not None:
+            group_discards.append(self.channel_layer.group_discard(self.user_group, self.channel_name))
+        if self.waiting_room_group is not None:
+            group_discards.append(self.channel_layer.group_discard(self.waiting_room_group, self.channel_name))
+        await asyncio.gather(*group_discards)
     
-    def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         """
         Called when we get a text frame from the client.
         """
         # Parse the received JSON
         try:
-            text_data_json = json.loads(text_data)
+            text_data_json = orjson.loads(text_data)
             message_type = text_data_json.get('message_type', '')
             
             # Handle different message types
             if message_type == 'ping':
-                self.send(text_data=json.dumps({
-                    'message_type': 'pong',
-                    'timestamp': text_data_json.get('timestamp')
-                }))
+                timestamp = orjson.dumps(text_data_json.get('timestamp')).decode()
+                await self.send(text_data=f"{PONG_FRAME_PREFIX}{timestamp}}}")
             else:
-                self.send(text_data=json.dumps({
+                await self.send(text_data=orjson.dumps({
                     'message_type': 'error',
                     'message': f"Unknown message type: {message_type}"
-                }))
-        except json.JSONDecodeError:
-            self.send(text_data=json.dumps({
+                }).decode())
+        except orjson.JSONDecodeError:
+            await self.send(text_data=orjson.dumps({
                 'message_type': 'error',
                 'message': 'Invalid JSON format'
-            }))
+            }).decode())
     
-    def settings_update(self, event):
+    async def settings_update(self, event):
         """
         Handler for settings_update event.
         """
         # Send the settings update message to the WebSocket
-        self.send(text_data=json.dumps({
+        await self.send(text_data=orjson.dumps({
             'message_type': event['message_type'],
             'game_settings': event['game_settings'],
             'updated_by': event['updated_by'],
             'timestamp': event['timestamp']
-        }))
+        }).decode())
         
         # Log that we sent the message
-        print(f"WebSocket message sent: settings_update to {self.game_id}")
+        logger.debug("WebSocket message sent: settings_update to %s", self.game_id)
     
-    def waitingroom_update(self, event):
+    async def waitingroom_update(self, event):
         """
         Handler for waitingroom_update event.
         Sends comprehensive waiting room state updates.
         """
         # Forward the waiting room update to the client
-        self.send(text_data=json.dumps({
+        # game_data arrives already serialized, so embed it without re-encoding
+        await self.send(text_data=orjson.dumps({
             'message_type': 'waitingroom_update',
-            'game_data': event['game_data'],
+            'game_data': orjson.Fragment(event['game_data_json']),
             'timestamp': event['timestamp']
-        }))
+        }).decode())
         
         # Log that we sent the message
-        print(f"WebSocket message sent: waitingroom_update to {self.game_id}")
+        logger.debug("WebSocket message sent: waitingroom_update to %s", self.game_id)
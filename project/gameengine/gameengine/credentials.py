@@ -14,3 +14,5 @@ DB_PASSWORD: Final[str] = 'postgres'
 # Redis connection
 REDIS_HOST: Final[str] = 'redis'
 REDIS_PORT: Final[str] = '6379'
+REDIS_URL: Final[str] = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
+REDIS_CACHE_URL: Final[str] = f"redis://{REDIS_HOST}:{REDIS_PORT}/1"
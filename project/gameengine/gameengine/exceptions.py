@@ -4,12 +4,16 @@ Defines custom exceptions specific to the app
 
 class GameEngineError(Exception):
     """Base exception for all game engine errors"""
-    pass
+    __slots__ = ()
 
 class InvalidGameStateError(GameEngineError):
     """Raised when an operation is attempted in an invalid game state"""
-    pass
+    __slots__ = ()
 
 class PlayerNotFoundError(GameEngineError):
     """Raised when a player is not found"""
-    pass
+    __slots__ = ()
+
+class RequestTooLargeError(GameEngineError):
+    """Raised when a request body exceeds the size the API accepts"""
+    __slots__ = ()
@@ -5,27 +5,51 @@ from channels.middleware import BaseMiddleware
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth import get_user_model
-from django.contrib.sessions.models import Session
-from django.http.cookie import SimpleCookie
-import datetime
+from django.contrib.auth import SESSION_KEY
+from django.conf import settings
+from django.core.cache import cache
+from django.http.cookie import parse_cookie
+from importlib import import_module
+
+from gameengine.project_settings import WS_USER_CACHE_SECONDS
 
 User = get_user_model()
+SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+
+def get_user_cache_key(user_id):
+    """
+    Get the cache key holding a user for WebSocket handshakes.
+    """
+    return f"ws_user:{user_id}"
 
 @database_sync_to_async
 def get_user(session_key):
     """
     Get the user from the session key.
+    
+    The session is always loaded, so expired, flushed and logged out sessions
+    stop authenticating immediately; with the cached_db engine that read is
+    normally a cache hit. Only the User lookup is cached, and inactive users
+    are treated as anonymous.
     """
-    try:
-        session = Session.objects.get(session_key=session_key)
-        session_data = session.get_decoded()
-        user_id = session_data.get('_auth_user_id')
-        
-        if user_id:
-            return User.objects.get(id=user_id)
+    user_id = SessionStore(session_key=session_key).get(SESSION_KEY)
+    if not user_id:
         return AnonymousUser()
-    except (Session.DoesNotExist, User.DoesNotExist):
+    
+    cache_key = get_user_cache_key(user_id)
+    user = cache.get(cache_key)
+    
+    if user is None:
+        try:
+            user = User.objects.get(id=user_id)
+        except User.DoesNotExist:
+            return AnonymousUser()
+        cache.set(cache_key, user, WS_USER_CACHE_SECONDS)
+    
+    if not user.is_active:
         return AnonymousUser()
+    
+    return user
 
 class WebSocketAuthMiddleware(BaseMiddleware):
     """
@@ -36,15 +60,10 @@ class WebSocketAuthMiddleware(BaseMiddleware):
         """
         Process the scope and add the user to it.
         """
-        # Parse cookies from headers using Django's SimpleCookie
-        cookies = {}
+        # Parse cookies with Django's split-based parser (no Morsel objects)
         headers = dict(scope.get('headers', []))
         cookie_header = headers.get(b'cookie', b'').decode('utf-8')
-        
-        if cookie_header:
-            cookie = SimpleCookie()
-            cookie.load(cookie_header)
-            cookies = {k: v.value for k, v in cookie.items()}
+        cookies = parse_cookie(cookie_header)
         
         # Get the session key
         session_key = cookies.get('sessionid')
@@ -0,0 +1,38 @@
+# Generated manually
+from django.db import migrations
+
+
+def backfill_creator_id(apps, schema_editor):
+    """
+    Copy the creator's user ID from joined_users into game_data['creator_id']
+    for games created before creator_id was stored.
+    """
+    GameInstance = apps.get_model('gameengine', 'GameInstance')
+    
+    for instance in GameInstance.objects.all():
+        if 'creator_id' in instance.game_data:
+            continue
+        
+        for joined_user in instance.game_data.get('joined_users', []):
+            if joined_user.get('is_creator', False):
+                instance.game_data['creator_id'] = joined_user.get('id')
+                instance.save(update_fields=['game_data'])
+                break
+
+
+def reverse_func(apps, schema_editor):
+    """
+    creator_id is additive and ignored by older code, so nothing to undo.
+    """
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameengine', '0002_load_initial_game_types'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_creator_id, reverse_func),
+    ]
@@ -0,0 +1,16 @@
+# Generated manually
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameengine', '0003_backfill_creator_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gameinstance',
+            index=models.Index(fields=['status', '-created_datetime', '-id'], name='gameinstance_status_created'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated manually
+from django.db import migrations
+
+
+# Wakes the game engine worker, which LISTENs on ready_games, as soon as a game becomes ready
+CREATE_NOTIFY_TRIGGER = """
+CREATE OR REPLACE FUNCTION gameengine_notify_ready_game() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('ready_games', NEW.id::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER gameengine_gameinstance_ready_notify
+AFTER INSERT OR UPDATE OF status ON gameengine_gameinstance
+FOR EACH ROW
+WHEN (NEW.status = 'ready')
+EXECUTE FUNCTION gameengine_notify_ready_game();
+"""
+
+DROP_NOTIFY_TRIGGER = """
+DROP TRIGGER IF EXISTS gameengine_gameinstance_ready_notify ON gameengine_gameinstance;
+DROP FUNCTION IF EXISTS gameengine_notify_ready_game();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameengine', '0004_gameinstance_status_created_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_NOTIFY_TRIGGER, DROP_NOTIFY_TRIGGER),
+    ]
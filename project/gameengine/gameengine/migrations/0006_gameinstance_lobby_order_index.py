@@ -0,0 +1,46 @@
+# Generated manually
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameengine', '0005_notify_ready_games'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='gameinstance',
+            name='gameinstance_status_created',
+        ),
+        migrations.AlterModelOptions(
+            name='gameinstance',
+            options={'ordering': [
+                models.Case(
+                    models.When(status='pending', then=0),
+                    models.When(status='ongoing', then=1),
+                    models.When(status='ended', then=2),
+                    default=3,
+                    output_field=models.IntegerField(),
+                ),
+                django.db.models.functions.comparison.Coalesce('started_datetime', 'created_datetime'),
+                'id',
+            ]},
+        ),
+        migrations.AddIndex(
+            model_name='gameinstance',
+            index=models.Index(
+                models.Case(
+                    models.When(status='pending', then=0),
+                    models.When(status='ongoing', then=1),
+                    models.When(status='ended', then=2),
+                    default=3,
+                    output_field=models.IntegerField(),
+                ),
+                django.db.models.functions.comparison.Coalesce('started_datetime', 'created_datetime'),
+                'id',
+                name='gameinstance_lobby_order',
+            ),
+        ),
+    ]
@@ -1,9 +1,33 @@
 import uuid
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+
+def lobby_status_rank():
+    """
+    Expression ranking a game instance's status in the lobby order:
+    pending, then ongoing, then ended, then anything else.
+    """
+    return models.Case(
+        models.When(status='pending', then=0),
+        models.When(status='ongoing', then=1),
+        models.When(status='ended', then=2),
+        default=3,
+        output_field=models.IntegerField(),
+    )
+
+
+def lobby_sort_time():
+    """
+    Expression ordering game instances within a status group: when the game
+    started, or when it was created for games that have not started yet.
+    """
+    return Coalesce('started_datetime', 'created_datetime')
+
+
 class GameType(models.Model):
     """
     Model representing a type of game available in the system.
@@ -38,15 +62,10 @@ class GameInstance(models.Model):
     game_data = models.JSONField(default=dict)
     
     class Meta:
-        ordering = [
-            models.Case(
-                models.When(status='pending', then=0),
-                models.When(status='ongoing', then=1),
-                models.When(status='ended', then=2),
-                default=3,
-                output_field=models.IntegerField(),
-            ),
-            'started_datetime'
+        ordering = [lobby_status_rank(), lobby_sort_time(), 'id']
+        indexes = [
+            # Matches the lobby ORDER BY, so each page of the listing is read in index order
+            models.Index(lobby_status_rank(), lobby_sort_time(), 'id', name='gameinstance_lobby_order'),
         ]
     
     def __str__(self):
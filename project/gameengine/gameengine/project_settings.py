@@ -4,4 +4,30 @@ Project-specific settings that are kept separate from Django's settings.py
 
 # Worker process settings
 WORKER_POLL_SECONDS = 5  # How often the worker process polls the database for ready games
+WORKER_GAME_START_THREADS = 4  # How many ready games the worker process starts in parallel
+GAME_INPUT_LISTEN_SECONDS = 0.1  # Longest the game input listener blocks waiting for a Redis message, so it bounds how long a subscription change waits
 
+# Channel layer settings
+CHANNEL_LAYER_MAX_CONNECTIONS = 100  # Upper bound on pooled Redis connections per process
+
+# WebSocket authentication settings
+WS_USER_CACHE_SECONDS = 300  # How long a session's user is cached for WebSocket handshakes
+
+# Game type settings
+GAME_TYPES_CACHE_SECONDS = 3600  # How long the game types list is cached between changes
+
+# Game instance listing settings
+GAME_INSTANCES_PAGE_SIZE = 50  # Game instances returned per page when no limit is given
+GAME_INSTANCES_MAX_PAGE_SIZE = 100  # Upper bound on the limit a client can request
+
+# Game tick settings
+GAME_TICK_OVERRUN_LIMIT = 3  # Consecutive over-budget ticks before a game starts skipping tick updates to catch up
+GAME_TICK_OVERRUN_YIELD_SECONDS = 0.001  # Pause after an over-budget tick so it never runs back to back
+
+# Game broadcast settings
+ELEMENTS_KEYFRAME_INTERVAL = 100  # Send the full element list every N tick updates so clients can resync from deltas
+OUTBOX_BATCH_SIZE = 128  # Most queued tick updates the outbox flusher sends in one pass
+OUTBOX_MAX_BACKOFF_SECONDS = 30  # Longest the outbox flusher drops messages after repeated send failures
+
+# API request settings
+MAX_JSON_BODY_BYTES = 64 * 1024  # Largest JSON request body the API will parse
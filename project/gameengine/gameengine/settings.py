@@ -5,6 +5,9 @@ Django settings for gameengine project.
 import os
 from pathlib import Path
 
+from gameengine.credentials import REDIS_CACHE_URL, REDIS_URL
+from gameengine.project_settings import CHANNEL_LAYER_MAX_CONNECTIONS
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -87,15 +90,37 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'postgres'),
         'HOST': os.environ.get('POSTGRES_HOST', 'db'),
         'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        # Close connections after each request by default: under ASGI each request's sync
+        # code runs in its own thread, so persistent connections are never reused and
+        # pile up (Django ticket #33497); pool web connections with pgbouncer instead.
+        # Worker processes, which reuse their threads, set DJANGO_MAX_CONN_AGE to keep theirs
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_MAX_CONN_AGE', '0')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Shared cache so every web and worker process sees the same entries and invalidations
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_CACHE_URL', REDIS_CACHE_URL),
     }
 }
 
+# Sessions are written through to the database but read from the cache first,
+# so WebSocket handshakes and HTTP requests avoid a django_session query
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 # Channel layers for WebSockets
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
-            'hosts': [(os.environ.get('REDIS_HOST', 'redis'), 6379)],
+            # Dict hosts give each process one bounded, reused connection pool
+            'hosts': [{
+                'address': os.environ.get('REDIS_URL', REDIS_URL),
+                'max_connections': CHANNEL_LAYER_MAX_CONNECTIONS,
+            }],
         },
     },
 }
@@ -0,0 +1,51 @@
+"""
+Signal receivers for the gameengine app.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from gameengine.middleware_asgi import get_user_cache_key
+from gameengine.models import GameType
+from gameengine.src.games import invalidate_game_types_cache
+
+
+@receiver(post_save, sender=GameType)
+@receiver(post_delete, sender=GameType)
+def game_type_changed(sender, **kwargs):
+    """
+    Invalidate the cached game types list when a game type is saved or deleted.
+    """
+    invalidate_game_types_cache()
+
+
+@receiver(post_migrate)
+def game_types_migrated(sender, **kwargs):
+    """
+    Invalidate the cached game types list after this app's migrations run,
+    since data migrations write through historical models and send no
+    save or delete signals.
+    """
+    if sender.label == 'gameengine':
+        invalidate_game_types_cache()
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    """
+    Drop the user cached for WebSocket handshakes when it is saved or deleted,
+    so changes such as deactivation apply to the next handshake.
+    """
+    cache.delete(get_user_cache_key(instance.pk))
+
+
+@receiver(user_logged_out)
+def forget_cached_user(sender, request, user, **kwargs):
+    """
+    Drop the cached WebSocket user as soon as it logs out.
+    """
+    if user is not None:
+        cache.delete(get_user_cache_key(user.pk))
@@ -5,7 +5,13 @@ This module centralizes all channel group name generation to ensure consistency
 across the application. Never hardcode channel group names in WebSocket consumers
 or messaging functions - always use these functions.
 """
+import functools
+import secrets
 
+# Group names are rebuilt on every broadcast, so memoize them per ID
+GROUP_NAME_CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize=GROUP_NAME_CACHE_SIZE)
 def get_user_group_name(user_id):
     """
     Get the channel group name for a specific user.
@@ -18,6 +24,7 @@ def get_user_group_name(user_id):
     """
     return f"user_{user_id}"
 
+@functools.lru_cache(maxsize=GROUP_NAME_CACHE_SIZE)
 def get_game_group_name(game_id):
     """
     Get the channel group name for a specific game.
@@ -30,6 +37,7 @@ def get_game_group_name(game_id):
     """
     return f"game_{game_id}"
 
+@functools.lru_cache(maxsize=GROUP_NAME_CACHE_SIZE)
 def get_waiting_room_group_name(game_id):
     """
     Get the channel group name for a specific waiting room.
@@ -41,3 +49,25 @@ def get_waiting_room_group_name(game_id):
         str: The channel group name for the waiting room
     """
     return f"waiting_room_{game_id}"
+
+@functools.lru_cache(maxsize=GROUP_NAME_CACHE_SIZE)
+def get_game_input_channel_name(game_id):
+    """
+    Get the Redis pubsub channel that player inputs for a game are published on.
+    
+    Args:
+        game_id: The ID of the game instance
+        
+    Returns:
+        str: The Redis channel name for the game's inputs
+    """
+    return f"game_{game_id}_input"
+
+def get_anonymous_group_name():
+    """
+    Get a unique channel group name for an anonymous connection.
+    
+    Returns:
+        str: A random, single-use channel group name
+    """
+    return f"anonymous_{secrets.token_hex(16)}"
@@ -1,58 +1,205 @@
 import json
 import datetime
 import logging
+import uuid
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.forms.models import model_to_dict
 from django.db import transaction
-from gameengine.models import GameType, GameInstance
+from django.db.models import BooleanField, Case, F, Func, IntegerField, JSONField, Q, Value, When
+from django.db.models.functions import Coalesce
+from gameengine.models import GameType, GameInstance, lobby_sort_time, lobby_status_rank
 from gameengine.exceptions import GameEngineError
+from gameengine.project_settings import (
+    GAME_INSTANCES_MAX_PAGE_SIZE,
+    GAME_INSTANCES_PAGE_SIZE,
+    GAME_TYPES_CACHE_SECONDS
+)
+from gameengine.src.websocket_messaging import send_settings_update_message
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Bumped whenever a GameType changes so stale cached lists are never read
+GAME_TYPES_CACHE_VERSION_KEY = 'game_types:version'
+
+# Game instances cursors count microseconds from here so they stay URL-safe
+GAME_INSTANCES_CURSOR_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
 class GameError(GameEngineError):
     """Base exception for game-related errors."""
-    pass
+    __slots__ = ()
 
 
 def get_all_game_types():
     """
-    Get all available game types.
+    Get all available game types, served from the cache while the
+    game types version is unchanged.
     
     Returns:
         list: List of game types as dictionaries
     """
-    game_types = GameType.objects.all()
-    result = []
+    version = cache.get(GAME_TYPES_CACHE_VERSION_KEY, 1)
+    return cache.get_or_set(f"game_types:v{version}", build_game_types_list, GAME_TYPES_CACHE_SECONDS)
+
+
+def build_game_types_list():
+    """
+    Build the list of game types from the database.
+    
+    Returns:
+        list: List of game types as dictionaries
+    """
+    return list(GameType.objects.values(
+        'id',
+        'name',
+        'description',
+        'image_url',
+        'max_players',
+        'default_settings'
+    ))
+
+
+def invalidate_game_types_cache():
+    """
+    Move the cached game types list to a new version key.
     
-    for game_type in game_types:
-        result.append({
-            'id': game_type.id,
-            'name': game_type.name,
-            'description': game_type.description,
-            'image_url': game_type.image_url,
-            'max_players': game_type.max_players,
-            'default_settings': game_type.default_settings
-        })
+    Called from the GameType save/delete and post_migrate signal receivers.
+    Queryset .update() and .bulk_create() send no signals, so code changing
+    game types that way must call this itself.
+    """
+    try:
+        cache.incr(GAME_TYPES_CACHE_VERSION_KEY)
+    except ValueError:
+        # No version stored yet, so readers are on the default version 1
+        cache.set(GAME_TYPES_CACHE_VERSION_KEY, 2, None)
+
+
+def get_all_game_instances(limit=None, after=None):
+    """
+    Get a page of game instances in lobby order: pending first, then ongoing,
+    then ended, each group sorted by when the game started (or was created,
+    for games that have not started).
+    
+    Pages are keyset paginated on (status rank, sort time, id), so each page
+    continues from the previous one rather than offsetting into every game.
+    
+    Args:
+        limit (str, optional): Maximum number of game instances to return,
+            capped at GAME_INSTANCES_MAX_PAGE_SIZE
+        after (str, optional): The 'next' cursor returned with the previous page
+        
+    Returns:
+        dict: 'game_instances' list of game instances as dictionaries, and the
+        'next' cursor for the following page (None on the last page)
+        
+    Raises:
+        GameError: If limit or after is invalid
+    """
+    try:
+        limit = min(int(limit), GAME_INSTANCES_MAX_PAGE_SIZE) if limit else GAME_INSTANCES_PAGE_SIZE
+    except ValueError:
+        raise GameError(f"Invalid limit: {limit}")
+    if limit < 1:
+        raise GameError(f"Invalid limit: {limit}")
+    
+    game_instances = annotate_game_instances(
+        GameInstance.objects.select_related('game_type').all()
+    ).annotate(
+        lobby_rank=lobby_status_rank(),
+        lobby_time=lobby_sort_time()
+    ).order_by('lobby_rank', 'lobby_time', 'id')
+    if after:
+        rank, sort_time, last_id = parse_game_instances_cursor(after)
+        game_instances = game_instances.filter(
+            Q(lobby_rank__gt=rank) |
+            Q(lobby_rank=rank, lobby_time__gt=sort_time) |
+            Q(lobby_rank=rank, lobby_time=sort_time, id__gt=last_id)
+        )
+    
+    # Fetch one extra row to learn whether there is a following page
+    instances = list(game_instances[:limit + 1].iterator())
+    next_cursor = None
+    if len(instances) > limit:
+        instances = instances[:limit]
+        next_cursor = format_game_instances_cursor(instances[-1])
     
-    return result
+    return {
+        'game_instances': [format_game_instance(instance) for instance in instances],
+        'next': next_cursor
+    }
 
 
-def get_all_game_instances():
+def annotate_game_instances(queryset):
     """
-    Get all game instances.
+    Annotate a GameInstance queryset with player_count and is_joinable computed
+    in SQL, so list endpoints don't walk joined_users in Python for every row.
     
+    Args:
+        queryset (QuerySet): GameInstance queryset joined to game_type
+        
     Returns:
-        list: List of game instances as dictionaries
+        QuerySet: The queryset with annotated_player_count and annotated_is_joinable
+    """
+    return queryset.annotate(
+        annotated_player_count=Coalesce(
+            Func(F('game_data__joined_users'), function='jsonb_array_length', output_field=IntegerField()),
+            Value(0)
+        )
+    ).annotate(
+        annotated_is_joinable=Case(
+            When(
+                status=GameInstance.Status.PENDING,
+                annotated_player_count__lt=F('game_type__max_players'),
+                then=Value(True)
+            ),
+            default=Value(False),
+            output_field=BooleanField()
+        )
+    )
+
+
+def format_game_instances_cursor(instance):
     """
-    game_instances = GameInstance.objects.all()
-    result = []
+    Build the cursor for the page following a game instance.
     
-    for instance in game_instances:
-        result.append(format_game_instance(instance))
+    The cursor is '<status rank>_<sort time as epoch microseconds>_<id>', which
+    needs no URL encoding, so clients can pass it back as 'after' unchanged.
     
-    return result
+    Args:
+        instance (GameInstance): The last game instance on the current page,
+            annotated with lobby_rank and lobby_time
+        
+    Returns:
+        str: The cursor for the following page
+    """
+    micros = (instance.lobby_time - GAME_INSTANCES_CURSOR_EPOCH) // datetime.timedelta(microseconds=1)
+    return f"{instance.lobby_rank}_{micros}_{instance.id}"
+
+
+def parse_game_instances_cursor(cursor):
+    """
+    Parse a game instances cursor built by format_game_instances_cursor.
+    
+    Args:
+        cursor (str): The cursor returned as 'next' by get_all_game_instances
+        
+    Returns:
+        tuple: The status rank, sort time and UUID of the last game instance on the previous page
+        
+    Raises:
+        GameError: If the cursor is malformed
+    """
+    try:
+        rank, micros, last_id = cursor.split('_', 2)
+        rank = int(rank)
+        sort_time = GAME_INSTANCES_CURSOR_EPOCH + datetime.timedelta(microseconds=int(micros))
+        last_id = uuid.UUID(last_id)
+    except (ValueError, OverflowError):
+        raise GameError(f"Invalid cursor: {cursor}")
+    
+    return rank, sort_time, last_id
 
 
 def get_game_instance(game_id):
@@ -69,7 +216,7 @@ def get_game_instance(game_id):
         GameError: If the game instance doesn't exist
     """
     try:
-        instance = GameInstance.objects.get(id=game_id)
+        instance = GameInstance.objects.select_related('game_type').get(id=game_id)
         return format_game_instance(instance)
     except GameInstance.DoesNotExist:
         raise GameError(f"Game instance with ID {game_id} not found")
@@ -97,6 +244,7 @@ def create_game_instance(game_type_id, instance_name, user):
     
     # Initialize game data with joined users and game settings
     game_data = {
+        'creator_id': user.id,
         'joined_users': [
             {
                 'id': user.id,
@@ -134,16 +282,16 @@ def update_game_status(game_id, status):
         if status not in valid_statuses:
             raise GameError(f"Invalid game status: {status}. Must be one of {valid_statuses}")
         
-        with transaction.atomic():
-            game = GameInstance.objects.select_for_update().get(id=game_id)
-            game.status = status
-            game.save(update_fields=['status'])
-            
-            logger.info(f"Updated game {game_id} status to {status}")
+        # A single UPDATE is atomic on its own, so there is no need for a
+        # transaction and a locking SELECT around it
+        if not GameInstance.objects.filter(id=game_id).update(status=status):
+            logger.error(f"Game {game_id} not found when updating status to {status}")
+            raise GameError(f"Game instance {game_id} not found")
+        
+        logger.info(f"Updated game {game_id} status to {status}")
             
-    except GameInstance.DoesNotExist:
-        logger.error(f"Game {game_id} not found when updating status to {status}")
-        raise GameError(f"Game instance {game_id} not found")
+    except GameError:
+        raise
     except Exception as e:
         logger.exception(f"Error updating game {game_id} status to {status}: {str(e)}")
         raise GameError(f"Failed to update game status: {str(e)}")
@@ -163,31 +311,38 @@ def join_game_instance(game_id, user):
     Raises:
         GameError: If the game instance doesn't exist or can't be joined
     """
-    try:
-        instance = GameInstance.objects.get(id=game_id)
-    except GameInstance.DoesNotExist:
-        raise GameError(f"Game instance with ID {game_id} not found")
-    
-    # Check if the game is joinable
-    if not instance.is_joinable:
-        raise GameError("This game cannot be joined")
-    
-    # Check if the user is already in the game
-    for joined_user in instance.joined_users:
-        if joined_user.get('id') == user.id:
-            return format_game_instance(instance)
-    
-    # Add the user to the joined_users list
-    game_data = instance.game_data
-    game_data['joined_users'].append({
-        'id': user.id,
-        'username': user.username,
-        'is_creator': False
-    })
-    
-    # Update the instance
-    instance.game_data = game_data
-    instance.save()
+    with transaction.atomic():
+        # Lock the row so concurrent joiners append to the same joined_users list
+        try:
+            instance = GameInstance.objects.select_for_update(of=('self',)).select_related('game_type').get(id=game_id)
+        except GameInstance.DoesNotExist:
+            raise GameError(f"Game instance with ID {game_id} not found")
+        
+        # Check if the game is joinable
+        if not instance.is_joinable:
+            raise GameError("This game cannot be joined")
+        
+        # Add the user to the joined_users list unless they are already in the game
+        joined_user_ids = {joined_user.get('id') for joined_user in instance.joined_users}
+        if user.id not in joined_user_ids:
+            joined_user = {
+                'id': user.id,
+                'username': user.username,
+                'is_creator': False
+            }
+            
+            # Append in place in Postgres rather than writing back the whole document
+            GameInstance.objects.filter(id=game_id).update(game_data=Func(
+                F('game_data'),
+                Value('{joined_users,-1}'),
+                Value(joined_user, output_field=JSONField()),
+                Value(True),
+                function='jsonb_insert',
+                output_field=JSONField()
+            ))
+            
+            # The row is locked, so mirror the change locally instead of refetching
+            instance.game_data['joined_users'].append(joined_user)
     
     return format_game_instance(instance)
 
@@ -206,29 +361,24 @@ def start_game_instance(game_id, user):
     Raises:
         GameError: If the game instance doesn't exist or can't be started
     """
-    try:
-        instance = GameInstance.objects.get(id=game_id)
-    except GameInstance.DoesNotExist:
-        raise GameError(f"Game instance with ID {game_id} not found")
-    
-    # Check if the game is in pending status
-    if instance.status != GameInstance.Status.PENDING:
-        raise GameError("Only pending games can be started")
-    
-    # Check if the user is the creator
-    creator_found = False
-    for joined_user in instance.joined_users:
-        if joined_user.get('id') == user.id and joined_user.get('is_creator', False):
-            creator_found = True
-            break
-    
-    if not creator_found:
-        raise GameError("Only the game creator can start the game")
-    
-    # Update the instance status and started_datetime
-    instance.status = GameInstance.Status.ONGOING
-    instance.started_datetime = timezone.now()
-    instance.save()
+    with transaction.atomic():
+        try:
+            instance = GameInstance.objects.select_for_update(of=('self',)).select_related('game_type').get(id=game_id)
+        except GameInstance.DoesNotExist:
+            raise GameError(f"Game instance with ID {game_id} not found")
+        
+        # Check if the game is in pending status
+        if instance.status != GameInstance.Status.PENDING:
+            raise GameError("Only pending games can be started")
+        
+        # Check if the user is the creator
+        if instance.game_data.get('creator_id') != user.id:
+            raise GameError("Only the game creator can start the game")
+        
+        # Update the instance status and started_datetime
+        instance.status = GameInstance.Status.ONGOING
+        instance.started_datetime = timezone.now()
+        instance.save(update_fields=['status', 'started_datetime'])
     
     return format_game_instance(instance)
 
@@ -248,34 +398,40 @@ def update_game_settings(game_id, user, game_settings):
     Raises:
         GameError: If the game instance doesn't exist or the user is not the creator
     """
-    try:
-        instance = GameInstance.objects.get(id=game_id)
-    except GameInstance.DoesNotExist:
-        raise GameError(f"Game instance with ID {game_id} does not exist")
-    
-    # Check if the user is the creator
-    creator_found = False
-    for joined_user in instance.joined_users:
-        if joined_user.get('id') == user.id and joined_user.get('is_creator', False):
-            creator_found = True
-            break
-    
-    if not creator_found:
-        raise GameError("Only the game creator can update settings")
-    
-    # Check if the game is still pending
-    if instance.status != GameInstance.Status.PENDING:
-        raise GameError("Cannot update settings for a game that has already started or ended")
-    
-    # Update the settings
-    game_data = instance.game_data
-    game_data['game_settings'] = game_settings
-    instance.game_data = game_data
-    instance.save()
+    with transaction.atomic():
+        try:
+            instance = GameInstance.objects.select_for_update(of=('self',)).select_related('game_type').get(id=game_id)
+        except GameInstance.DoesNotExist:
+            raise GameError(f"Game instance with ID {game_id} does not exist")
+        
+        # Check if the user is the creator
+        if instance.game_data.get('creator_id') != user.id:
+            raise GameError("Only the game creator can update settings")
+        
+        # Check if the game is still pending
+        if instance.status != GameInstance.Status.PENDING:
+            raise GameError("Cannot update settings for a game that has already started or ended")
+        
+        # Resubmitting the current settings (e.g. from an auto-saving form) is a no-op
+        settings_changed = instance.game_data.get('game_settings') != game_settings
+        
+        if settings_changed:
+            # Replace the settings in place in Postgres rather than writing back the whole document
+            GameInstance.objects.filter(id=game_id).update(game_data=Func(
+                F('game_data'),
+                Value('{game_settings}'),
+                Value(game_settings, output_field=JSONField()),
+                Value(True),
+                function='jsonb_set',
+                output_field=JSONField()
+            ))
+            
+            # The row is locked, so mirror the change locally instead of refetching
+            instance.game_data['game_settings'] = game_settings
     
     # Send a WebSocket message to all users in the waiting room
-    from gameengine.src.websocket_messaging import send_settings_update_message
-    send_settings_update_message(game_id, game_settings, user)
+    if settings_changed:
+        send_settings_update_message(game_id, game_settings, user)
     
     return instance
 
@@ -290,6 +446,14 @@ def format_game_instance(instance):
     Returns:
         dict: Formatted game instance
     """
+    # Prefer the SQL-computed values from annotate_game_instances() when present
+    player_count = getattr(instance, 'annotated_player_count', None)
+    if player_count is None:
+        player_count = instance.player_count
+    is_joinable = getattr(instance, 'annotated_is_joinable', None)
+    if is_joinable is None:
+        is_joinable = instance.is_joinable
+    
     game_type = {
         'id': instance.game_type.id,
         'name': instance.game_type.name,
@@ -306,8 +470,8 @@ def format_game_instance(instance):
         'created_datetime': instance.created_datetime.isoformat() if instance.created_datetime else None,
         'started_datetime': instance.started_datetime.isoformat() if instance.started_datetime else None,
         'ended_datetime': instance.ended_datetime.isoformat() if instance.ended_datetime else None,
-        'player_count': instance.player_count,
+        'player_count': player_count,
         'joined_users': instance.joined_users,
-        'is_joinable': instance.is_joinable,
+        'is_joinable': is_joinable,
         'game_settings': instance.game_data.get('game_settings', {})
     }
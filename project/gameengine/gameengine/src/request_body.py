@@ -0,0 +1,30 @@
+"""
+Request body parsing for the gameengine API.
+"""
+import orjson
+from gameengine.exceptions import RequestTooLargeError
+from gameengine.project_settings import MAX_JSON_BODY_BYTES
+
+def parse_json_body(request):
+    """
+    Parse a JSON request body with orjson, rejecting oversized bodies from
+    their Content-Length before the body is read.
+    
+    Args:
+        request (HttpRequest): The request to parse
+        
+    Returns:
+        Any: The parsed JSON body
+        
+    Raises:
+        RequestTooLargeError: If the body is larger than MAX_JSON_BODY_BYTES
+        orjson.JSONDecodeError: If the body is not valid JSON (a json.JSONDecodeError subclass)
+    """
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > MAX_JSON_BODY_BYTES:
+        raise RequestTooLargeError(f"Request body must be at most {MAX_JSON_BODY_BYTES} bytes")
+    
+    return orjson.loads(request.body)
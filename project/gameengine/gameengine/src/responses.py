@@ -0,0 +1,37 @@
+"""
+HTTP response helpers for the gameengine app.
+"""
+import decimal
+import orjson
+from django.http import HttpResponse
+from django.utils.functional import Promise
+
+def _default(obj):
+    """
+    Serialize the types orjson does not handle natively.
+    
+    UUIDs and datetimes are handled by orjson itself; this covers the other
+    types Django's JSON encoder supports.
+    
+    Args:
+        obj: The object orjson could not serialize
+        
+    Returns:
+        str: The string form of the object
+        
+    Raises:
+        TypeError: If the object's type is not supported
+    """
+    if isinstance(obj, (decimal.Decimal, Promise)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonResponse(HttpResponse):
+    """
+    JSON response serialized with orjson, a drop-in replacement for JsonResponse.
+    """
+    
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=orjson.dumps(data, default=_default), **kwargs)
@@ -3,9 +3,143 @@ WebSocket messaging functionality for the gameengine app.
 """
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from collections import deque
 from datetime import datetime
+import asyncio
+import logging
+import threading
+import time
+import orjson
+from project.gameengine.gameengine.project_settings import OUTBOX_BATCH_SIZE, OUTBOX_MAX_BACKOFF_SECONDS
 from project.gameengine.gameengine.src.channel_groups import get_user_group_name, get_waiting_room_group_name, get_game_group_name
 
+logger = logging.getLogger(__name__)
+
+# Resolve the channel layer and wrap its group_send once per process instead of per message.
+# The layer is None when CHANNEL_LAYERS is not configured (e.g. some test settings), so
+# importing this module must not depend on it
+_channel_layer = get_channel_layer()
+_group_send = async_to_sync(_channel_layer.group_send) if _channel_layer is not None else None
+
+# Tick updates from every game in the process are queued here and sent by one flusher
+# thread, which keeps a single event loop (and so a single Redis connection pool) alive
+# instead of each game thread blocking on its own group_send
+_outbox = deque()  # (group name, message) pairs waiting to be sent
+_outbox_ready = threading.Event()
+_outbox_lock = threading.Lock()
+_outbox_thread = None
+
+
+def _queue_group_send(group_name, message):
+    """
+    Queue a message for the outbox flusher thread, starting it on first use.
+    
+    Args:
+        group_name (str): The channel group to send to
+        message (dict): The channel layer message
+    """
+    global _outbox_thread
+    
+    _outbox.append((group_name, message))
+    
+    if _outbox_thread is None:
+        with _outbox_lock:
+            if _outbox_thread is None:
+                _outbox_thread = threading.Thread(target=_run_outbox_flusher, name='websocket-outbox')
+                _outbox_thread.daemon = True  # Make thread a daemon so it exits when main process exits
+                _outbox_thread.start()
+    
+    _outbox_ready.set()
+
+
+def _run_outbox_flusher():
+    """
+    Drain the outbox in batches of up to OUTBOX_BATCH_SIZE messages on this thread's event loop.
+    
+    When a batch fails, queued messages are dropped for an exponentially growing
+    backoff (capped at OUTBOX_MAX_BACKOFF_SECONDS) rather than retrying and logging
+    on every tick while Redis is down. The last message dropped for each group is
+    kept and sent once the backoff ends, so a game's final won/lost/ended state is
+    never lost; clients resync elements from the next element keyframe.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    
+    failures = 0  # Consecutive failed batches
+    skip_until = 0  # time.monotonic() value before which queued messages are dropped
+    held = {}  # Group name to the last message dropped for it during the backoff
+    
+    while True:
+        # Wake up when the backoff ends to send held messages even if nothing new is queued
+        _outbox_ready.wait(max(0, skip_until - time.monotonic()) if held else None)
+        _outbox_ready.clear()
+        
+        while _outbox or held:
+            batch = [_outbox.popleft() for _ in range(min(len(_outbox), OUTBOX_BATCH_SIZE))]
+            
+            if time.monotonic() < skip_until:
+                for group_name, message in batch:
+                    held[group_name] = message
+                if not _outbox:
+                    break
+                continue
+            
+            if held:
+                # Held messages are older than anything still queued, so send them first
+                batch = list(held.items()) + batch
+                held = {}
+            
+            try:
+                error = loop.run_until_complete(_send_batch(batch))
+            except Exception as e:
+                error = e
+            
+            if error is None:
+                failures = 0
+            else:
+                failures += 1
+                for group_name, message in batch:
+                    held[group_name] = message
+                backoff = min(OUTBOX_MAX_BACKOFF_SECONDS, 0.1 * 2 ** failures)
+                skip_until = time.monotonic() + backoff
+                logger.error(f"Error flushing queued WebSocket messages, dropping messages for {backoff:.1f}s: {str(error)}")
+
+
+async def _send_batch(batch):
+    """
+    Send a batch of queued messages, concurrently across groups but in queue order
+    within each group so a game's tick updates never overtake each other.
+    
+    Args:
+        batch (list): (group name, message) pairs in the order they were queued
+        
+    Returns:
+        Exception: The first error raised while sending, or None if every group was sent to
+    """
+    messages_by_group = {}
+    for group_name, message in batch:
+        messages_by_group.setdefault(group_name, []).append(message)
+    
+    results = await asyncio.gather(
+        *(_send_in_order(group_name, messages) for group_name, messages in messages_by_group.items()),
+        return_exceptions=True
+    )
+    
+    return next((result for result in results if isinstance(result, Exception)), None)
+
+
+async def _send_in_order(group_name, messages):
+    """
+    Send one group's queued messages one after another.
+    
+    Args:
+        group_name (str): The channel group to send to
+        messages (list): The group's messages in queue order
+    """
+    for message in messages:
+        await _channel_layer.group_send(group_name, message)
+
+
 def send_validation_message(user_id):
     """
     Send a validation message to a specific user via WebSocket.
@@ -16,14 +150,11 @@ def send_validation_message(user_id):
     Returns:
         bool: True if the message was sent successfully
     """
-    # Get the channel layer
-    channel_layer = get_channel_layer()
-    
     # Get the user's group name
     group_name = get_user_group_name(user_id)
     
     # Send a message to the group
-    async_to_sync(channel_layer.group_send)(
+    _group_send(
         group_name,
         {
             'type': 'validation_message',
@@ -48,14 +179,11 @@ def send_settings_update_message(game_id, game_settings, user):
     Returns:
         bool: True if the message was sent successfully
     """
-    # Get the channel layer
-    channel_layer = get_channel_layer()
-    
     # Get the waiting room group name
     group_name = get_waiting_room_group_name(game_id)
     
     # Send the message to the waiting room group
-    async_to_sync(channel_layer.group_send)(
+    _group_send(
         group_name,
         {
             'type': 'settings_update',
@@ -72,28 +200,19 @@ def send_settings_update_message(game_id, game_settings, user):
     return True
 
 
-def send_game_state_update(game_id, status, resources, wave, time_remaining=None):
+def build_game_state(status, resources, wave, time_remaining=None):
     """
-    Send a game state update message to all users in a game.
-    This is a proper use of WebSockets for real-time game state updates.
+    Build the game_state payload shared by game state and tick updates.
     
     Args:
-        game_id (UUID): The ID of the game instance
         status (str): Current status of the game ('active', 'paused', 'won', 'lost')
         resources (dict): Dictionary containing lives, money, and score
         wave (int): Current wave number
         time_remaining (int, optional): Time remaining in seconds
         
     Returns:
-        bool: True if the message was sent successfully
+        dict: The game_state payload
     """
-    # Get the channel layer
-    channel_layer = get_channel_layer()
-    
-    # Get the game group name
-    group_name = get_game_group_name(game_id)
-    
-    # Prepare the game state message
     game_state = {
         'status': status,
         'resources': resources,
@@ -104,48 +223,81 @@ def send_game_state_update(game_id, status, resources, wave, time_remaining=None
     if time_remaining is not None:
         game_state['time_remaining'] = time_remaining
     
-    # Send the message to the game group
-    async_to_sync(channel_layer.group_send)(
-        group_name,
-        {
-            'type': 'game_state',
-            'message_type': 'game_state',
-            'game_state': game_state,
-            'timestamp': datetime.now().isoformat()
-        }
-    )
+    return game_state
+
+
+def diff_elements(previous, elements):
+    """
+    Diff a game's elements against the snapshot of what was last sent.
     
-    return True
+    Elements are compared by their serialized form, so in-place changes to
+    nested properties (e.g. position) are detected.
+    
+    Args:
+        previous (dict): Element ID to serialized element, as returned by the last call
+        elements (list): Current list of game elements, each with an 'id'
+        
+    Returns:
+        tuple: The delta dict with 'added', 'changed' and 'removed' lists, and
+        the new snapshot to pass in next time
+    """
+    snapshot = {}
+    added = []
+    changed = []
+    
+    for element in elements:
+        encoded = orjson.dumps(element)
+        previous_encoded = previous.get(element['id'])
+        snapshot[element['id']] = encoded
+        
+        if previous_encoded is None:
+            added.append(element)
+        elif previous_encoded != encoded:
+            changed.append(element)
+    
+    removed = [element_id for element_id in previous if element_id not in snapshot]
+    
+    return {'added': added, 'changed': changed, 'removed': removed}, snapshot
 
 
-def send_elements_update(game_id, elements):
+def send_tick_update(game_id, *, game_state=None, elements=None, elements_delta=None, seq=None):
     """
-    Send an elements update message to all users in a game.
-    This is a proper use of WebSockets for real-time game element updates.
+    Send the game state and element updates produced by one game tick as a
+    single message to all users in a game, so a tick costs one group_send.
+    
+    The message is queued for the outbox flusher thread rather than sent
+    before returning, so the calling game thread is not held up by Redis.
     
     Args:
         game_id (UUID): The ID of the game instance
-        elements (list): List of game elements with their updated properties
+        game_state (dict, optional): Game state payload from build_game_state()
+        elements (list, optional): Full list of game elements, sent as a keyframe
+        elements_delta (dict, optional): Element changes since the last update, from diff_elements()
+        seq (int, optional): Sequence number of this element update, so clients can detect gaps
         
     Returns:
-        bool: True if the message was sent successfully
+        bool: True if the message was queued
     """
-    # Get the channel layer
-    channel_layer = get_channel_layer()
-    
     # Get the game group name
     group_name = get_game_group_name(game_id)
     
-    # Send the message to the game group
-    async_to_sync(channel_layer.group_send)(
-        group_name,
-        {
-            'type': 'elems_update',
-            'message_type': 'elems_update',
-            'list_items': elements,
-            'timestamp': datetime.now().isoformat()
-        }
-    )
+    # Only include the payloads this tick produced
+    message = {
+        'type': 'tick_update',
+        'message_type': 'tick_update',
+        'timestamp': datetime.now().isoformat()
+    }
+    if game_state is not None:
+        message['game_state'] = game_state
+    if elements is not None:
+        message['list_items'] = elements
+    if elements_delta is not None:
+        message['list_delta'] = elements_delta
+    if seq is not None:
+        message['seq'] = seq
+    
+    # Queue the message for the game group
+    _queue_group_send(group_name, message)
     
     return True
 
@@ -162,19 +314,17 @@ def send_waitingroom_update(game_id, game_data):
     Returns:
         bool: True if the message was sent successfully
     """
-    # Get the channel layer
-    channel_layer = get_channel_layer()
-    
     # Get the waiting room group name
     group_name = get_waiting_room_group_name(game_id)
     
-    # Send the message to the waiting room group
-    async_to_sync(channel_layer.group_send)(
+    # Send the message to the waiting room group with game_data serialized once
+    # here, so each recipient consumer splices it into its frame without re-encoding
+    _group_send(
         group_name,
         {
             'type': 'waitingroom_update',
             'message_type': 'waitingroom_update',
-            'game_data': game_data,
+            'game_data_json': orjson.dumps(game_data),
             'timestamp': datetime.now().isoformat()
         }
     )
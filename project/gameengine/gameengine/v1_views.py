@@ -4,7 +4,7 @@ API views for the gameengine app.
 from typing import Dict, Any, Optional, List, Union
 from uuid import UUID
 
-from django.http import JsonResponse, HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
 from django.utils.decorators import method_decorator
@@ -13,6 +13,8 @@ from django.views.decorators.csrf import csrf_exempt
 import json
 
 # Import all required functionality from src modules
+from project.gameengine.gameengine.src.request_body import RequestTooLargeError, parse_json_body
+from project.gameengine.gameengine.src.responses import OrjsonResponse
 from project.gameengine.gameengine.src.websocket_messaging import send_validation_message
 from project.gameengine.gameengine.src.games import (
     get_all_game_types,
@@ -24,62 +26,69 @@ from project.gameengine.gameengine.src.games import (
     update_game_settings
 )
 
-@method_decorator(csrf_exempt, name='dispatch')
-class TriggerWebSocketView(LoginRequiredMixin, View):
+class ApiView(LoginRequiredMixin, View):
+    """
+    Base class for the v1 API views: login required, CSRF exempt, and JSON
+    error responses for unsupported methods.
+    """
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        return super().dispatch(request, *args, **kwargs)
+    
+    def http_method_not_allowed(self, request: HttpRequest, *args: Any, **kwargs: Any) -> OrjsonResponse:
+        return OrjsonResponse({
+            'status': 'error',
+            'message': 'Method not allowed'
+        }, status=405)
+
+
+class TriggerWebSocketView(ApiView):
     """
     API endpoint to trigger a WebSocket message.
     """
-    def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+    def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> OrjsonResponse:
         """
         Handle POST requests to trigger a WebSocket message.
         """
         # Call the function to send a WebSocket message
         send_validation_message(request.user.id)
         
-        return JsonResponse({
+        return OrjsonResponse({
             'status': 'success',
             'message': 'WebSocket message triggered'
         })
     
-    def http_method_not_allowed(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+    def http_method_not_allowed(self, request: HttpRequest, *args: Any, **kwargs: Any) -> OrjsonResponse:
         """
         Handle methods other than POST.
         """
-        return JsonResponse({
+        return OrjsonResponse({
             'status': 'error',
             'message': 'Only POST requests are allowed'
         }, status=405)
 
 
-@method_decorator(csrf_exempt, name='dispatch')
-class GameTypesView(LoginRequiredMixin, View):
+class GameTypesView(ApiView):
     """
     API endpoint to get all game types.
     """
-    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> OrjsonResponse:
         game_types = get_all_game_types()
-        return JsonResponse({'game_types': game_types})
-    
-    def http_method_not_allowed(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
-        return JsonResponse({
-            'status': 'error',
-            'message': 'Method not allowed'
-        }, status=405)
+        return OrjsonResponse({'game_types': game_types})
 
 
-@method_decorator(csrf_exempt, name='dispatch')
-class UpdateGameSettingsView(LoginRequiredMixin, View):
+class UpdateGameSettingsView(ApiView):
     """
     API endpoint to update game settings.
     """
-    def post(self, request: HttpRequest, game_id: UUID, *args: Any, **kwargs: Any) -> JsonResponse:
+    def post(self, request: HttpRequest, game_id: UUID, *args: Any, **kwargs: Any) -> OrjsonResponse:
         try:
             # Parse the request body
-            data = json.loads(request.body)
+            data = parse_json_body(request)
             game_settings = data.get('game_settings')
             
             if not game_settings:
-                return JsonResponse({
+                return OrjsonResponse({
                     'status': 'error',
                     'message': 'Game settings are required'
                 }, status=400)
@@ -87,46 +96,53 @@ class UpdateGameSettingsView(LoginRequiredMixin, View):
             # Update the game settings
             updated_instance = update_game_settings(game_id, request.user, game_settings)
             
-            return JsonResponse({
+            return OrjsonResponse({
                 'status': 'success',
                 'message': 'Game settings updated successfully',
                 'game_settings': updated_instance.game_data['game_settings']
             })
+        except RequestTooLargeError as e:
+            return OrjsonResponse({
+                'status': 'error',
+                'message': str(e)
+            }, status=413)
         except json.JSONDecodeError:
-            return JsonResponse({
+            return OrjsonResponse({
                 'status': 'error',
                 'message': 'Invalid JSON'
             }, status=400)
         except Exception as e:
-            return JsonResponse({
+            return OrjsonResponse({
                 'status': 'error',
                 'message': str(e)
             }, status=400)
-    
-    def http_method_not_allowed(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
-        return JsonResponse({
-            'status': 'error',
-            'message': 'Method not allowed'
-        }, status=405)
 
 
-@method_decorator(csrf_exempt, name='dispatch')
-class GameInstancesView(LoginRequiredMixin, View):
+class GameInstancesView(ApiView):
     """
     API endpoint to get all game instances or create a new one.
     """
-    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
-        game_instances = get_all_game_instances()
-        return JsonResponse({'game_instances': game_instances})
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> OrjsonResponse:
+        try:
+            page = get_all_game_instances(
+                limit=request.GET.get('limit'),
+                after=request.GET.get('after')
+            )
+            return OrjsonResponse(page)
+        except Exception as e:
+            return OrjsonResponse({
+                'status': 'error',
+                'message': str(e)
+            }, status=400)
     
-    def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
+    def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> OrjsonResponse:
         try:
-            data = json.loads(request.body)
+            data = parse_json_body(request)
             game_type_id = data.get('game_type_id')
             instance_name = data.get('instance_name')
             
             if not game_type_id or not instance_name:
-                return JsonResponse({
+                return OrjsonResponse({
                     'status': 'error',
                     'message': 'Missing required fields'
                 }, status=400)
@@ -137,83 +153,61 @@ class GameInstancesView(LoginRequiredMixin, View):
                 user=request.user
             )
             
-            return JsonResponse(game_instance, status=201)
+            return OrjsonResponse(game_instance, status=201)
+        except RequestTooLargeError as e:
+            return OrjsonResponse({
+                'status': 'error',
+                'message': str(e)
+            }, status=413)
         except Exception as e:
-            return JsonResponse({
+            return OrjsonResponse({
                 'status': 'error',
                 'message': str(e)
             }, status=400)
-    
-    def http_method_not_allowed(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
-        return JsonResponse({
-            'status': 'error',
-            'message': 'Method not allowed'
-        }, status=405)
 
 
-@method_decorator(csrf_exempt, name='dispatch')
-class GameInstanceDetailView(LoginRequiredMixin, View):
+class GameInstanceDetailView(ApiView):
     """
     API endpoint to get details of a specific game instance.
     """
-    def get(self, request: HttpRequest, game_id: UUID, *args: Any, **kwargs: Any) -> JsonResponse:
+    def get(self, request: HttpRequest, game_id: UUID, *args: Any, **kwargs: Any) -> OrjsonResponse:
         try:
             game_instance = get_game_instance(game_id)
-            return JsonResponse(game_instance)
+            return OrjsonResponse(game_instance)
         except Exception as e:
-            return JsonResponse({
+            return OrjsonResponse({
                 'status': 'error',
                 'message': str(e)
             }, status=404)
-    
-    def http_method_not_allowed(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
-        return JsonResponse({
-            'status': 'error',
-            'message': 'Method not allowed'
-        }, status=405)
 
 
-@method_decorator(csrf_exempt, name='dispatch')
-class JoinGameView(LoginRequiredMixin, View):
+class JoinGameView(ApiView):
     """
     API endpoint to join a game instance.
     """
-    def post(self, request: HttpRequest, game_id: UUID, *args: Any, **kwargs: Any) -> JsonResponse:
+    def post(self, request: HttpRequest, game_id: UUID, *args: Any, **kwargs: Any) -> OrjsonResponse:
         try:
             game_instance = join_game_instance(game_id, request.user)
-            return JsonResponse(game_instance)
+            return OrjsonResponse(game_instance)
         except Exception as e:
-            return JsonResponse({
+            return OrjsonResponse({
                 'status': 'error',
                 'message': str(e)
             }, status=400)
-    
-    def http_method_not_allowed(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
-        return JsonResponse({
-            'status': 'error',
-            'message': 'Method not allowed'
-        }, status=405)
 
 
-@method_decorator(csrf_exempt, name='dispatch')
-class StartGameView(LoginRequiredMixin, View):
+class StartGameView(ApiView):
     """
     API endpoint to start a game instance.
     """
-    def post(self, request: HttpRequest, game_id: UUID, *args: Any, **kwargs: Any) -> JsonResponse:
+    def post(self, request: HttpRequest, game_id: UUID, *args: Any, **kwargs: Any) -> OrjsonResponse:
         try:
             game_instance = start_game_instance(game_id, request.user)
-            return JsonResponse(game_instance)
+            return OrjsonResponse(game_instance)
         except Exception as e:
-            return JsonResponse({
+            return OrjsonResponse({
                 'status': 'error',
                 'message': str(e)
             }, status=400)
-    
-    def http_method_not_allowed(self, request: HttpRequest, *args: Any, **kwargs: Any) -> JsonResponse:
-        return JsonResponse({
-            'status': 'error',
-            'message': 'Method not allowed'
-        }, status=405)
 
 
@@ -4,8 +4,12 @@
 import $ from 'jquery';
 import API_URLS from './api_urls';
 
+// Cursor for the page after the last one shown, or null once every page is shown
+let nextGameInstancesCursor = null;
+
 /**
- * Load game instances from the API
+ * Load the first page of game instances from the API. Used for the initial load
+ * and the periodic refresh, so a refresh costs a single request
  */
 function loadGameInstances() {
     $.ajax({
@@ -13,6 +17,7 @@ function loadGameInstances() {
         type: 'GET',
         success: function(response) {
             renderGameInstances(response.game_instances);
+            updateLoadMoreButton(response.next);
         },
         error: function(xhr, status, error) {
             console.error('Failed to load game instances:', error);
@@ -23,6 +28,37 @@ function loadGameInstances() {
     });
 }
 
+/**
+ * Load the next page of game instances and add it below the ones already shown
+ */
+function loadMoreGameInstances() {
+    if (!nextGameInstancesCursor) {
+        return;
+    }
+    
+    $.ajax({
+        url: API_URLS.GAME_INSTANCES,
+        type: 'GET',
+        data: { after: nextGameInstancesCursor },
+        success: function(response) {
+            $('#game-instances-table tbody').append(buildGameInstanceRows(response.game_instances));
+            updateLoadMoreButton(response.next);
+        },
+        error: function(xhr, status, error) {
+            console.error('Failed to load more game instances:', error);
+        }
+    });
+}
+
+/**
+ * Remember the cursor for the following page and show the load more button while there is one
+ * @param {string|null} next - The 'next' cursor from the last page loaded
+ */
+function updateLoadMoreButton(next) {
+    nextGameInstancesCursor = next || null;
+    $('#load-more-game-instances').toggleClass('d-none', !nextGameInstancesCursor);
+}
+
 /**
  * Render game instances in the UI
  * @param {Array} gameInstances - The game instances to render
@@ -35,6 +71,15 @@ function renderGameInstances(gameInstances) {
         return;
     }
 
+    $('#game-instances-table tbody').html(buildGameInstanceRows(gameInstances));
+}
+
+/**
+ * Build the table rows for a list of game instances
+ * @param {Array} gameInstances - The game instances to build rows for
+ * @returns {string} The HTML for the rows
+ */
+function buildGameInstanceRows(gameInstances) {
     let html = '';
     gameInstances.forEach(function(instance) {
         const statusClass = getStatusClass(instance.status);
@@ -54,7 +99,7 @@ function renderGameInstances(gameInstances) {
         `;
     });
 
-    $('#game-instances-table tbody').html(html);
+    return html;
 }
 
 /**
@@ -120,4 +165,4 @@ function capitalizeFirstLetter(string) {
     return string.charAt(0).toUpperCase() + string.slice(1);
 }
 
-export { loadGameInstances, joinGame, capitalizeFirstLetter };
+export { loadGameInstances, loadMoreGameInstances, joinGame, capitalizeFirstLetter };
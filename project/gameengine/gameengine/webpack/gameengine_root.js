@@ -8,7 +8,7 @@ import './game_tiles.css';
 import WebSocketClient from './websocket_client';
 import API_URLS from './api_urls';
 import { loadGameTypes, showNewGameModal, createNewGame } from './game_types';
-import { loadGameInstances, joinGame } from './game_instances';
+import { loadGameInstances, loadMoreGameInstances, joinGame } from './game_instances';
 import { triggerWebSocketMessage } from './utils';
 
 /**
@@ -29,6 +29,12 @@ function setupEventHandlers() {
         joinGame(gameId);
     });
     
+    // Load the next page of game instances
+    $('#load-more-game-instances').on('click', function(e) {
+        e.preventDefault();
+        loadMoreGameInstances();
+    });
+    
     // Create game button in modal
     $('#createGameBtn').on('click', function() {
         createNewGame();
@@ -42,7 +48,7 @@ function setupEventHandlers() {
         }
     });
     
-    // Refresh game instances periodically
+    // Refresh the first page of game instances periodically
     setInterval(loadGameInstances, 10000); // Refresh every 10 seconds
 }
 
@@ -93,26 +93,40 @@ class WebSocketClient {
         
         try {
             const data = JSON.parse(event.data);
-            const messageType = data.type || 'unknown';
             
-            // Call all handlers for this message type
-            if (this.messageHandlers[messageType]) {
-                this.messageHandlers[messageType].forEach(handler => {
-                    handler(data);
-                });
-            }
-            
-            // Call all handlers for 'all' message type
-            if (this.messageHandlers['all']) {
-                this.messageHandlers['all'].forEach(handler => {
-                    handler(data);
-                });
+            // Frames flushed in the same server tick arrive wrapped in a 'multi' envelope
+            if (data.message_type === 'multi') {
+                data.events.forEach(this._dispatchMessage.bind(this));
+            } else {
+                this._dispatchMessage(data);
             }
         } catch (error) {
             console.error('Error parsing WebSocket message:', error);
         }
     }
 
+    /**
+     * Call the registered handlers for a single parsed message
+     * @private
+     */
+    _dispatchMessage(data) {
+        const messageType = data.message_type || data.type || 'unknown';
+        
+        // Call all handlers for this message type
+        if (this.messageHandlers[messageType]) {
+            this.messageHandlers[messageType].forEach(handler => {
+                handler(data);
+            });
+        }
+        
+        // Call all handlers for 'all' message type
+        if (this.messageHandlers['all']) {
+            this.messageHandlers['all'].forEach(handler => {
+                handler(data);
+            });
+        }
+    }
+
     /**
      * Handle WebSocket error event
      * @private
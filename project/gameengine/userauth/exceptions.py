@@ -2,8 +2,8 @@ from gameengine.exceptions import GameEngineError
 
 class UserAuthError(GameEngineError):
     """Base exception for user authentication errors"""
-    pass
+    __slots__ = ()
 
 class RegistrationError(UserAuthError):
     """Exception raised when user registration fails"""
-    pass
+    __slots__ = ()
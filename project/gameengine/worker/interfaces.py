@@ -5,6 +5,11 @@ Exposes functions for other apps to interact with the simulation worker.
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+# Resolve the channel layer and wrap its send once per process instead of per call.
+# The layer is None when CHANNEL_LAYERS is not configured, so importing must not depend on it
+_channel_layer = get_channel_layer()
+_send = async_to_sync(_channel_layer.send) if _channel_layer is not None else None
+
 
 def start_game_simulation(game_id, settings=None):
     """
@@ -14,8 +19,7 @@ def start_game_simulation(game_id, settings=None):
         game_id: UUID of the game instance
         settings: Optional dictionary of game settings
     """
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.send)(
+    _send(
         "simulation",
         {
             "type": "start_simulation",
@@ -32,8 +36,7 @@ def stop_game_simulation(game_id):
     Args:
         game_id: UUID of the game instance
     """
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.send)(
+    _send(
         "simulation",
         {
             "type": "stop_simulation",
@@ -51,8 +54,7 @@ def update_game_entity(game_id, entity_id, entity_data):
         entity_id: ID of the entity to update
         entity_data: Dictionary of entity data
     """
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.send)(
+    _send(
         "simulation",
         {
             "type": "update_entity",
@@ -63,6 +65,25 @@ def update_game_entity(game_id, entity_id, entity_data):
     )
 
 
+def update_game_entities(game_id, entities):
+    """
+    Update several entities in a game simulation with a single channel
+    layer send, instead of one update_game_entity round-trip per entity.
+    
+    Args:
+        game_id: UUID of the game instance
+        entities: Dictionary of entity data keyed by entity ID
+    """
+    _send(
+        "simulation",
+        {
+            "type": "update_entities",
+            "game_id": str(game_id),
+            "entities": entities
+        }
+    )
+
+
 def update_game_settings(game_id, settings):
     """
     Update settings for a game simulation.
@@ -71,8 +92,7 @@ def update_game_settings(game_id, settings):
         game_id: UUID of the game instance
         settings: Dictionary of game settings
     """
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.send)(
+    _send(
         "simulation",
         {
             "type": "update_settings",
@@ -2,11 +2,15 @@
 Management command to run the game engine process
 """
 import logging
+import multiprocessing
+import os
 import signal
 import sys
 from django.core.management.base import BaseCommand
+from django.db import connections
 
 from worker.src.game_engine_process import GameEngineProcess
+from worker.src.game_task_manager import game_task_manager
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +20,18 @@ class Command(BaseCommand):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.game_engine = None
+        self.engine_processes = []
         self.setup_signal_handlers()
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='Number of game engine processes to run; games are spread across them so ticks are not limited by one GIL, '
+                 'and the CPU cores are split between their tick pools (default: 1)'
+        )
+
     def setup_signal_handlers(self):
         """Set up signal handlers for graceful shutdown"""
         signal.signal(signal.SIGINT, self.handle_shutdown)
@@ -28,16 +42,59 @@ class Command(BaseCommand):
         self.stdout.write(self.style.WARNING(f"Received signal {signum}, shutting down..."))
         if self.game_engine:
             self.game_engine.stop()
+        self.stop_engine_processes()
         sys.exit(0)
 
+    def stop_engine_processes(self):
+        """Ask each child engine process to shut down and wait for it"""
+        for process in self.engine_processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.engine_processes:
+            process.join()
+        self.engine_processes = []
+
+    def run_game_engine(self):
+        """Run one game engine process until it is stopped"""
+        self.game_engine = GameEngineProcess()
+        self.game_engine.start()
+
+    def run_engine_process(self, process_count: int):
+        """Entry point of a child engine process"""
+        # Forked children must open their own database connections
+        connections.close_all()
+        self.engine_processes = []
+        
+        # Share the cores between the children so their tick pools together hold
+        # about one thread (and database connection) per core rather than one per core each
+        game_task_manager.set_max_workers(max(1, (os.cpu_count() or 1) // process_count))
+        
+        try:
+            self.run_game_engine()
+        finally:
+            if self.game_engine:
+                self.game_engine.stop()
+
     def handle(self, *args, **options):
         """Run the game engine process"""
-        self.stdout.write(self.style.SUCCESS('Starting Game Engine Process'))
+        process_count = max(1, options['processes'])
+        self.stdout.write(self.style.SUCCESS(f'Starting Game Engine Process ({process_count} processes)'))
         
         try:
-            # Create and start the game engine process
-            self.game_engine = GameEngineProcess()
-            self.game_engine.start()
+            if process_count == 1:
+                # Create and start the game engine process
+                self.run_game_engine()
+            else:
+                # Each process claims ready games with FOR UPDATE SKIP LOCKED, so games
+                # are spread across processes without any further coordination
+                context = multiprocessing.get_context('fork')
+                for i in range(process_count):
+                    process = context.Process(target=self.run_engine_process, args=(process_count,), name=f'game-engine-{i}')
+                    process.start()
+                    self.engine_processes.append(process)
+                
+                for process in self.engine_processes:
+                    process.join()
         except KeyboardInterrupt:
             self.stdout.write(self.style.WARNING('Game Engine Process interrupted by user'))
         except Exception as e:
@@ -46,5 +103,6 @@ class Command(BaseCommand):
         finally:
             if self.game_engine:
                 self.game_engine.stop()
+            self.stop_engine_processes()
             
             self.stdout.write(self.style.SUCCESS('Game Engine Process stopped'))
@@ -2,19 +2,50 @@
 Game Engine Process - Main worker process that polls for ready games and starts game subprocesses
 """
 import time
+import select
 import logging
-import importlib
+from concurrent.futures import ThreadPoolExecutor
 from uuid import UUID
 from typing import Dict, Any, Optional
 
+import orjson
+import psycopg2
+import psycopg2.extensions
 from django.conf import settings
+from django.db import close_old_connections, connection
 
-from gameengine.project_settings import WORKER_POLL_SECONDS
+from gameengine.project_settings import WORKER_GAME_START_THREADS, WORKER_POLL_SECONDS
 from gameengine.src.games import update_game_status
 from gameengine.exceptions import GameEngineError
-from gameengine.models import GameInstance
+from worker.src.games import tower_defense
 logger = logging.getLogger(__name__)
 
+# Postgres NOTIFY channel raised by the gameengine_gameinstance trigger when a game becomes ready
+READY_GAMES_CHANNEL = 'ready_games'
+
+# Claims every ready game in one statement: locks the ready rows (skipping rows another
+# engine worker has already locked), moves them to 'starting', and returns what is needed
+# to start them. The query shape never changes, so it is written once here rather than
+# compiled by the ORM on every poll
+CLAIM_READY_GAMES_SQL = """
+UPDATE gameengine_gameinstance AS gi
+SET status = 'starting'
+FROM gameengine_gametype AS gt
+WHERE gt.id = gi.game_type_id
+AND gi.id IN (
+    SELECT id FROM gameengine_gameinstance
+    WHERE status = 'ready'
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING gi.id, gi.instance_name, COALESCE(gi.game_data -> 'game_settings', '{}'::jsonb), gt.id, gt.name
+"""
+
+# Game process class for each game_type_id, imported once at startup
+# Add more game types as their modules are implemented
+GAME_CLASSES = {
+    1: tower_defense.GameProcess,
+}
+
 # Dictionary to track running game processes
 # Key: game_id (UUID), Value: game process object
 running_games = {}
@@ -28,6 +59,10 @@ class GameEngineProcess:
     def __init__(self):
         self.poll_interval = WORKER_POLL_SECONDS
         self.running = True
+        self.listen_connection = None
+        
+        # Starting a game writes its status to the database, so start ready games in parallel
+        self.game_starter = ThreadPoolExecutor(max_workers=WORKER_GAME_START_THREADS, thread_name_prefix='game-start')
         logger.info("Game Engine Process initialized with poll interval: %s seconds", self.poll_interval)
     
     def start(self):
@@ -35,6 +70,9 @@ class GameEngineProcess:
         logger.info("Starting Game Engine Process")
         
         try:
+            # Wake up as soon as a game becomes ready rather than only every poll interval
+            self.listen_connection = self._open_listen_connection()
+            
             while self.running:
                 # Poll for ready games
                 ready_games = self._poll_for_ready_games()
@@ -45,8 +83,12 @@ class GameEngineProcess:
                 # Check status of running games
                 self._check_running_games()
                 
-                # Sleep for the configured interval
-                time.sleep(self.poll_interval)
+                # Outside a request cycle Django never applies CONN_MAX_AGE on its own, so
+                # release expired or broken connections before idling
+                close_old_connections()
+                
+                # Wait for a ready game notification, at most the configured interval
+                self._wait_for_ready_games()
         except KeyboardInterrupt:
             logger.info("Game Engine Process stopped by user")
         except Exception as e:
@@ -60,6 +102,51 @@ class GameEngineProcess:
         self.running = False
         self._cleanup()
     
+    def _open_listen_connection(self):
+        """Open a dedicated database connection that LISTENs for ready games
+        
+        Returns:
+            connection: The psycopg2 connection, or None if it could not be opened,
+            in which case the loop falls back to sleeping between polls
+        """
+        try:
+            listen_connection = psycopg2.connect(**connection.get_connection_params())
+            listen_connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with listen_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {READY_GAMES_CHANNEL}")
+            logger.info("Listening for ready games on channel: %s", READY_GAMES_CHANNEL)
+            return listen_connection
+        except Exception as e:
+            logger.exception("Error listening for ready games, falling back to polling: %s", str(e))
+            return None
+    
+    def _wait_for_ready_games(self):
+        """Block until a ready game is notified or the poll interval elapses
+        
+        The interval still bounds the wait so running games are checked regularly.
+        """
+        if self.listen_connection is None:
+            time.sleep(self.poll_interval)
+        else:
+            try:
+                readable, _, _ = select.select([self.listen_connection], [], [], self.poll_interval)
+                if readable:
+                    # Drain the notifications; the next poll picks up every ready game at once
+                    self.listen_connection.poll()
+                    self.listen_connection.notifies.clear()
+            except Exception as e:
+                logger.exception("Error waiting for ready games, falling back to polling: %s", str(e))
+                self._close_listen_connection()
+    
+    def _close_listen_connection(self):
+        """Close the ready games LISTEN connection if it is open"""
+        if self.listen_connection is not None:
+            try:
+                self.listen_connection.close()
+            except Exception as e:
+                logger.error("Error closing ready games connection: %s", str(e))
+            self.listen_connection = None
+    
     def _poll_for_ready_games(self):
         """Poll the database for games in READY state
         
@@ -77,45 +164,48 @@ class GameEngineProcess:
     def _start_ready_games(self, ready_games: list):
         """Start game subprocesses for all ready games that aren't already running"""
         try:
-            for game in ready_games:
-                game_id = game['id']
-                game_type = game['game_type']['id']
-                
-                # Start the game if it's not already running
-                if str(game_id) not in running_games:
-                    self._start_game_subprocess(game_id, game_type, game)
+            # Filter out games that are already running in a single pass
+            new_games = [game for game in ready_games if str(game['id']) not in running_games]
+            
+            # Start the new games in parallel, then record the ones that started
+            futures = {
+                str(game['id']): self.game_starter.submit(self._start_game_subprocess, game['id'], game['game_type']['id'], game)
+                for game in new_games
+            }
+            for game_id, future in futures.items():
+                game_process = future.result()
+                if game_process is not None:
+                    running_games[game_id] = game_process
         except Exception as e:
             logger.exception("Error starting ready games: %s", str(e))
     
     def _get_ready_games(self) -> list:
         """
-        Query the database for games in READY state
-        Returns a list of game instances
+        Claim the games in READY state by moving them to 'starting'
+        Returns a list of the claimed game instances
         """
-        # This is a placeholder for actual database query
-        # In a real implementation, you would use Django ORM
-
-        
         ready_games = []
         try:
-            # Get all game instances with status 'ready'
-            game_instances = GameInstance.objects.filter(status='ready')
+            with connection.cursor() as cursor:
+                cursor.execute(CLAIM_READY_GAMES_SQL)
+                rows = cursor.fetchall()
             
-            for instance in game_instances:
+            for game_id, instance_name, game_settings, game_type_id, game_type_name in rows:
                 # Format the game instance data
                 game_data = {
-                    'id': instance.id,
+                    'id': game_id,
                     'game_type': {
-                        'id': instance.game_type.id,
-                        'name': instance.game_type.name
+                        'id': game_type_id,
+                        'name': game_type_name
                     },
-                    'instance_name': instance.instance_name,
-                    'game_settings': instance.game_data.get('game_settings', {})
+                    'instance_name': instance_name,
+                    # Django leaves jsonb undecoded on raw cursors
+                    'game_settings': orjson.loads(game_settings)
                 }
                 ready_games.append(game_data)
-                
-                # Update the game status to 'starting'
-                update_game_status(instance.id, 'starting')
+            
+            if ready_games:
+                logger.info("Updated %s ready games to starting", len(ready_games))
                 
         except Exception as e:
             logger.exception("Error getting ready games: %s", str(e))
@@ -123,69 +213,53 @@ class GameEngineProcess:
         return ready_games
     
     def _start_game_subprocess(self, game_id: UUID, game_type_id: int, game_data: Dict[str, Any]):
-        """Start a game subprocess for the specified game"""
+        """Start a game subprocess for the specified game
+        
+        Returns:
+            BaseGameProcess: The started game process, or None if it could not be started
+        """
+        game_process = None
         try:
             logger.info(f"Starting game subprocess for game_id: {game_id}, type: {game_type_id}")
             
-            # Determine which game module to load based on game_type_id
-            game_module = self._get_game_module(game_type_id)
+            # Look up the game process class for this game_type_id
+            game_class = GAME_CLASSES.get(game_type_id)
             
-            if not game_module:
+            if game_class is None:
                 logger.error(f"No game module found for game type: {game_type_id}")
-                return
-            
-            # Import the game module dynamically
-            try:
-                module = importlib.import_module(f"worker.src.games.{game_module}")
-                game_class = getattr(module, "GameProcess")
-                
+                # Update game status to 'error'
+                update_game_status(game_id, 'error')
+            else:
                 # Create and start the game process
                 game_process = game_class(game_id, game_data)
                 game_process.start()
                 
-                # Store the running game process
-                running_games[str(game_id)] = game_process
-                
                 logger.info(f"Game subprocess started for game_id: {game_id}")
-                
-            except (ImportError, AttributeError) as e:
-                logger.exception(f"Error importing game module {game_module}: {str(e)}")
-                # Update game status to 'error'
-                update_game_status(game_id, 'error')
-                
         except Exception as e:
             logger.exception(f"Error starting game subprocess: {str(e)}")
+            game_process = None
             # Update game status to 'error'
             update_game_status(game_id, 'error')
-    
-    def _get_game_module(self, game_type_id: int) -> Optional[str]:
-        """
-        Map game_type_id to the appropriate game module
-        Returns the module name or None if not found
-        """
-        # This is a simple switch case implementation using a dictionary
-        game_modules = {
-            1: "tower_defense",
-            2: "resource_management",
-            3: "puzzle_game",
-            # Add more game types as needed
-        }
+        finally:
+            # Game start threads are long lived, so release the connection their
+            # status writes opened rather than holding one per thread
+            connection.close()
         
-        return game_modules.get(game_type_id)
+        return game_process
     
     def _check_running_games(self):
         """Check the status of running games and clean up completed ones"""
-        games_to_remove = []
+        global running_games
         
+        # Rebuild the dictionary with only the games still running, in one pass
+        still_running = {}
         for game_id, game_process in running_games.items():
-            # Check if the game is still running
-            if not game_process.is_running():
+            if game_process.is_running():
+                still_running[game_id] = game_process
+            else:
                 logger.info(f"Game {game_id} has completed")
-                games_to_remove.append(game_id)
         
-        # Remove completed games
-        for game_id in games_to_remove:
-            del running_games[game_id]
+        running_games = still_running
     
     def _cleanup(self):
         """Clean up resources when stopping the process"""
@@ -202,4 +276,10 @@ class GameEngineProcess:
         # Clear the running games dictionary
         running_games.clear()
         
+        # Let any in-flight game starts finish
+        self.game_starter.shutdown(wait=True)
+        
+        # Stop listening for ready games
+        self._close_listen_connection()
+        
         # No need to manually close database connections - Django handles this
@@ -0,0 +1,109 @@
+"""
+Game Input Subscriber - Pushes player inputs published to Redis into running game processes
+"""
+import functools
+import logging
+import os
+import queue
+import threading
+import time
+
+import orjson
+import redis
+
+from gameengine.credentials import REDIS_URL
+from gameengine.project_settings import GAME_INPUT_LISTEN_SECONDS
+from gameengine.src.channel_groups import get_game_input_channel_name
+
+logger = logging.getLogger(__name__)
+
+class GameInputSubscriber:
+    """
+    Shares one Redis pubsub connection and listener thread across every game in the worker.
+    
+    Messages on a game's input channel are JSON objects of the form
+    {"user_id": <int>, "input": {...}} and are handed to the game's
+    process_user_input() as they arrive, so games never poll for input.
+    
+    redis-py's PubSub is not thread-safe, so only the listener thread touches
+    it: subscribe() and unsubscribe() queue the change, and the listener applies
+    queued changes between reads.
+    """
+    
+    def __init__(self, redis_url: str):
+        self.pubsub = redis.Redis.from_url(redis_url).pubsub(ignore_subscribe_messages=True)
+        self.commands = queue.SimpleQueue()  # (method name, args) subscription changes for the listener to apply
+        self.lock = threading.Lock()
+        self.listener_thread = None
+    
+    def subscribe(self, game):
+        """
+        Start delivering a game's input channel to the game.
+        
+        Args:
+            game: BaseGameProcess to deliver inputs to
+        """
+        channel = get_game_input_channel_name(game.game_id)
+        self.commands.put_nowait(('subscribe', {channel: functools.partial(self._deliver, game)}))
+        
+        if self.listener_thread is None:
+            with self.lock:
+                if self.listener_thread is None:
+                    self.listener_thread = threading.Thread(target=self._run_listener, name='game-input-listener')
+                    self.listener_thread.daemon = True  # Make thread a daemon so it exits when main process exits
+                    self.listener_thread.start()
+    
+    def unsubscribe(self, game):
+        """
+        Stop delivering a game's input channel.
+        
+        Args:
+            game: BaseGameProcess to stop delivering inputs to
+        """
+        self.commands.put_nowait(('unsubscribe', get_game_input_channel_name(game.game_id)))
+    
+    def _run_listener(self):
+        """Apply queued subscription changes and dispatch input messages to their games"""
+        while True:
+            try:
+                self._apply_commands()
+                
+                if self.pubsub.subscribed:
+                    # Handlers registered with subscribe() are called by get_message()
+                    self.pubsub.get_message(timeout=GAME_INPUT_LISTEN_SECONDS)
+                else:
+                    # Nothing to read yet, so wait for the next subscription change
+                    self._apply_command(*self.commands.get())
+            except Exception as e:
+                # pubsub resubscribes on reconnect, so keep listening across Redis errors
+                logger.error(f"Error receiving game inputs from Redis: {str(e)}")
+                time.sleep(GAME_INPUT_LISTEN_SECONDS)
+    
+    def _apply_commands(self):
+        """Apply every queued subscribe and unsubscribe on the listener thread"""
+        while True:
+            try:
+                method, args = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            
+            self._apply_command(method, args)
+    
+    def _apply_command(self, method, args):
+        """Apply one queued subscribe or unsubscribe to the pubsub connection"""
+        if method == 'subscribe':
+            self.pubsub.subscribe(**args)
+        else:
+            self.pubsub.unsubscribe(args)
+    
+    @staticmethod
+    def _deliver(game, message):
+        """Decode an input message and pass it to the game"""
+        try:
+            payload = orjson.loads(message['data'])
+            game.process_user_input(payload['user_id'], payload['input'])
+        except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed input for game {game.game_id}: {str(e)}")
+
+# Shared by every game process in this worker
+game_input_subscriber = GameInputSubscriber(os.environ.get('REDIS_URL', REDIS_URL))
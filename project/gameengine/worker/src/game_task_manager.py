@@ -0,0 +1,107 @@
+"""
+Game Task Manager - Runs the ticks of every game process on a shared thread pool
+"""
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class GameTaskManager:
+    """
+    Schedules game ticks onto a shared pool of worker threads.
+    
+    Instead of one thread per game, each active game is kept in a heap ordered
+    by the deadline of its next tick. A scheduler thread waits for the earliest
+    deadline and hands that game's tick to the pool; once the tick finishes the
+    game is pushed back with its next deadline, so a game never has more than
+    one tick in flight.
+    """
+    
+    def __init__(self, max_workers: int):
+        self.executor = self._create_executor(max_workers)
+        self.schedule = []  # Heap of (deadline, sequence, game)
+        self.sequence = itertools.count()  # Tie-breaker so games are never compared directly
+        self.condition = threading.Condition()
+        self.scheduler_thread = None
+        self.spin_margin = 0.002  # Final stretch before a deadline that is spun rather than slept
+        self.min_sleep = 0.001  # Shortest sleep so waiting never turns into a pure busy loop
+    
+    def _create_executor(self, max_workers: int) -> ThreadPoolExecutor:
+        """Create the pool that game ticks run on"""
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='game-tick')
+    
+    def set_max_workers(self, max_workers: int):
+        """
+        Resize the tick pool. Only call this before any game has been added,
+        e.g. in a forked engine process sharing the host's cores with its siblings.
+        
+        Args:
+            max_workers: Number of threads to run game ticks on
+        """
+        self.executor.shutdown(wait=False)
+        self.executor = self._create_executor(max_workers)
+    
+    def add(self, game, deadline: float = None):
+        """
+        Schedule the next tick of a game.
+        
+        Args:
+            game: BaseGameProcess to tick
+            deadline: time.perf_counter() value to run the tick at, defaults to now
+        """
+        if deadline is None:
+            deadline = time.perf_counter()
+        
+        with self.condition:
+            heapq.heappush(self.schedule, (deadline, next(self.sequence), game))
+            
+            if self.scheduler_thread is None:
+                self.scheduler_thread = threading.Thread(target=self._run_scheduler, name='game-scheduler')
+                self.scheduler_thread.daemon = True  # Make thread a daemon so it exits when main process exits
+                self.scheduler_thread.start()
+            
+            self.condition.notify()
+    
+    def _run_scheduler(self):
+        """Hand each game's tick to the pool once its deadline arrives"""
+        while True:
+            with self.condition:
+                while not self.schedule:
+                    self.condition.wait()
+                
+                deadline, _, game = self.schedule[0]
+                slack = deadline - time.perf_counter()
+                
+                if slack > self.spin_margin:
+                    # Sleep until just before the deadline, since sleeps overshoot by a
+                    # millisecond or more; re-check after waking in case a game with an
+                    # earlier deadline was added
+                    self.condition.wait(max(slack - self.spin_margin, self.min_sleep))
+                    continue
+                
+                heapq.heappop(self.schedule)
+            
+            # Spin out the remaining slack so the tick starts on time
+            while time.perf_counter() < deadline:
+                time.sleep(0)  # Yield the GIL to running ticks while spinning
+            
+            self.executor.submit(self._run_tick, game)
+    
+    def _run_tick(self, game):
+        """Run one tick of a game and reschedule it while it is still running"""
+        try:
+            next_deadline = game.run_tick()
+        except Exception as e:
+            logger.exception(f"Unhandled error ticking game {game.game_id}: {str(e)}")
+            return
+        
+        if next_deadline is not None:
+            self.add(game, next_deadline)
+
+# Shared by every game process in this worker
+game_task_manager = GameTaskManager(max_workers=os.cpu_count() or 1)
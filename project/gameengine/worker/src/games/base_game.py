@@ -2,16 +2,40 @@
 Base Game Process - Abstract base class for all game processes
 """
 import logging
+import queue
 import threading
 import time
+from dataclasses import dataclass, field
 from uuid import UUID
 from typing import Dict, Any, Optional
 
+import orjson
+from django.db import connection
+
+from gameengine.project_settings import ELEMENTS_KEYFRAME_INTERVAL, GAME_TICK_OVERRUN_LIMIT, GAME_TICK_OVERRUN_YIELD_SECONDS
 from gameengine.src.games import update_game_status
-from gameengine.src.websocket_messaging import send_game_state_update
+from gameengine.src.websocket_messaging import build_game_state, diff_elements, send_tick_update
+from worker.src.game_input_subscriber import game_input_subscriber
+from worker.src.game_task_manager import game_task_manager
 
 logger = logging.getLogger(__name__)
 
+# Input fields describing held state (pressed keys, mouse position), which persist
+# between ticks; every other field is a one-shot action delivered to a single tick
+PERSISTENT_INPUTS = ('keys', 'mouse')
+
+@dataclass(slots=True)
+class GameState:
+    """
+    State shared by all game types. Games with additional state subclass this
+    and set BaseGameProcess.game_state_class; slots keep the attribute reads
+    on every tick cheap.
+    """
+    status: str = 'initializing'
+    resources: Dict[str, Any] = field(default_factory=dict)
+    progress: int = 0  # Generic progress indicator
+    time_remaining: Optional[float] = None
+
 class BaseGameProcess:
     """
     Abstract base class for all game processes.
@@ -23,17 +47,21 @@ class BaseGameProcess:
     - _process_game_tick(): Process a single game tick
     
     Game state is unique to each game type and should be defined in the
-    game's implementation. The base class provides a minimal structure
+    game's implementation by subclassing GameState and setting
+    game_state_class. The base class provides a minimal structure
     that can be extended as needed.
     """
     
+    game_state_class = GameState
+    
     def __init__(self, game_id: UUID, game_data: Dict[str, Any]):
         self.game_id = game_id
         self.game_data = game_data
         self.game_settings = game_data.get('game_settings', {})
         self.instance_name = game_data.get('instance_name', 'Unknown Game')
         self.running = False
-        self.thread = None
+        self.initialized = False
+        self.finished = threading.Event()  # Set once the game's final tick has run
         
         # Configure game tick rate and update frequency
         self.game_tick_rate = self.game_settings.get('game_tick_rate', 0.1)  # Default: 10 ticks per second
@@ -41,29 +69,32 @@ class BaseGameProcess:
         self.update_interval = 1.0 / self.frames_per_second if self.frames_per_second > 0 else 0.1
         
         # Track time for update frequency
-        self.last_update_time = 0
+        self.next_update_time = 0  # time.perf_counter() value the next tick update is due at
+        self.tick_overruns = 0  # Consecutive ticks that took longer than game_tick_rate
+        
+        # Track what elements clients have been sent so ticks only carry changes
+        self.sent_elements = {}  # Element ID to serialized element
+        self.sent_game_state = None  # Serialized game state from the last tick update
+        self.elements_seq = 0
         
-        # User input tracking
-        self.user_inputs = {}  # Dictionary to store user inputs by user_id
-        self.input_lock = threading.Lock()  # Lock for thread-safe access to user_inputs
+        # User input tracking: inputs are queued as they arrive and drained once per tick
+        self._input_queue = queue.SimpleQueue()  # (user_id, input_data) pairs received since the last tick
+        self._user_inputs = {}  # User ID to held input state (PERSISTENT_INPUTS), kept between ticks
         
-        self.game_state = {
-            'status': 'initializing',
-            # Game-specific state should be added by subclasses
-        }
+        self.game_state = self.game_state_class()
         
         logger.info(f"Initialized BaseGameProcess for game {self.game_id} with tick rate: {self.game_tick_rate}s, update interval: {self.update_interval}s")
     
     def start(self):
-        """Start the game process in a separate thread"""
+        """Start the game process by registering it with the shared game task manager"""
         if self.running:
             logger.warning(f"Game {self.game_id} is already running")
             return
         
         self.running = True
-        self.thread = threading.Thread(target=self._run_game_loop)
-        self.thread.daemon = True  # Make thread a daemon so it exits when main process exits
-        self.thread.start()
+        self.finished.clear()
+        game_input_subscriber.subscribe(self)
+        game_task_manager.add(self)
         
         # Update game status in database
         update_game_status(self.game_id, 'ongoing')
@@ -74,12 +105,11 @@ class BaseGameProcess:
         logger.info(f"Stopping game {self.game_id}")
         self.running = False
         
-        if self.thread and self.thread.is_alive():
-            # Wait for the thread to finish
-            self.thread.join(timeout=5.0)
-            
-        # Update game status in database
-        update_game_status(self.game_id, 'ended')
+        # Wait for the task manager to run the game's final tick, which also
+        # records the ended status; only write it here if that did not happen
+        if not self.finished.wait(timeout=5.0):
+            update_game_status(self.game_id, 'ended')
+        
         logger.info(f"Game {self.game_id} stopped")
     
     def is_running(self) -> bool:
@@ -87,29 +117,40 @@ class BaseGameProcess:
         if not self.running:
             return False
         
-        if self.thread and not self.thread.is_alive():
+        if self.finished.is_set():
             self.running = False
             return False
             
         return True
     
-    def _run_game_loop(self):
-        """Main game loop - to be implemented by subclasses"""
+    def run_tick(self) -> Optional[float]:
+        """
+        Run one tick of the game. Called by the game task manager on a pool thread.
+        
+        The first call initializes the game and sends the initial state before
+        ticking. Once the game stops or fails, the final state is sent and no
+        further ticks are scheduled.
+        
+        Returns:
+            float: time.perf_counter() deadline for the next tick, or None if the game has finished
+        """
+        tick_start_time = time.perf_counter()
+        next_deadline = None
+        
         try:
-            # Initialize the game
-            self._initialize_game()
-            
-            # Update game status
-            self.game_state['status'] = 'active'
-            self._send_game_state_update()
-            
-            # Track time for update frequency
-            self.last_update_time = time.time()
-            
-            # Run the game loop until stopped
-            while self.running:
-                loop_start_time = time.time()
+            if not self.initialized:
+                # Initialize the game
+                self._initialize_game()
+                self.initialized = True
+                
+                # Update game status and send the initial state and elements together
+                self.game_state.status = 'active'
+                self._send_tick_update()
                 
+                # Track time for update frequency, on the same clock as tick deadlines
+                self.next_update_time = tick_start_time + self.update_interval
+            
+            if self.running:
                 # Get user inputs for this tick
                 user_inputs = self._get_user_inputs()
                 
@@ -117,31 +158,59 @@ class BaseGameProcess:
                 self._process_game_tick(user_inputs)
                 
                 # Send updates to clients based on frames_per_second setting
-                current_time = time.time()
-                time_since_last_update = current_time - self.last_update_time
-                
-                if time_since_last_update >= self.update_interval:
-                    self._send_game_state_update()
-                    self.last_update_time = current_time
+                if tick_start_time >= self.next_update_time:
+                    self._send_tick_update()
+                    
+                    # Advance by the interval to keep a steady cadence, but restart it
+                    # rather than sending a burst of updates after falling behind
+                    self.next_update_time += self.update_interval
+                    if self.next_update_time <= tick_start_time:
+                        self.next_update_time = tick_start_time + self.update_interval
                 
-                # Calculate how long to sleep to maintain the desired tick rate
-                processing_time = time.time() - loop_start_time
-                sleep_time = max(0, self.game_tick_rate - processing_time)
+                # Schedule the next tick to maintain the desired tick rate
+                next_deadline = tick_start_time + self.game_tick_rate
+                tick_end_time = time.perf_counter()
                 
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
+                if next_deadline < tick_end_time:
+                    # The tick ran over budget. Yield briefly rather than ticking back to back,
+                    # and once it keeps happening skip a tick update to let the game catch up.
+                    # The count restarts after each skip so an overloaded game skips one update
+                    # per GAME_TICK_OVERRUN_LIMIT overruns instead of never sending again
+                    self.tick_overruns += 1
+                    if self.tick_overruns > GAME_TICK_OVERRUN_LIMIT:
+                        self.next_update_time = tick_end_time + self.update_interval * 2
+                        self.tick_overruns = 0
+                    next_deadline = tick_end_time + GAME_TICK_OVERRUN_YIELD_SECONDS
+                else:
+                    self.tick_overruns = 0
                 
         except Exception as e:
             logger.exception(f"Error in game loop for {self.game_id}: {str(e)}")
-            self.game_state['status'] = 'error'
-            self._send_game_state_update()
-        finally:
-            # Ensure game status is updated when the loop exits
-            if self.game_state['status'] not in ['won', 'lost', 'error']:
-                self.game_state['status'] = 'ended'
+            # The final state, with the error status, is sent by _finish_game()
+            self.game_state.status = 'error'
+            next_deadline = None
+        
+        if next_deadline is None:
+            self._finish_game()
+        
+        return next_deadline
+    
+    def _finish_game(self):
+        """Send the final game state once the game has stopped ticking"""
+        try:
+            game_input_subscriber.unsubscribe(self)
+            
+            # Ensure game status is updated when the game stops
+            if self.game_state.status not in ['won', 'lost', 'error']:
+                self.game_state.status = 'ended'
             
             self._send_game_state_update()
             update_game_status(self.game_id, 'ended')
+        finally:
+            # This runs on a tick pool thread, which would otherwise keep its own
+            # database connection open until the thread happens to write again
+            connection.close()
+            self.finished.set()
     
     def _initialize_game(self):
         """Initialize the game state - to be implemented by subclasses"""
@@ -159,74 +228,138 @@ class BaseGameProcess:
     def _get_user_inputs(self):
         """
         Get user inputs for the current game tick.
-        This is a stub that would be replaced with actual Redis pubsub implementation.
+        
+        Drains every input queued by process_user_input() since the last tick.
+        Held state (pressed keys, mouse position) is merged into each user's
+        persistent inputs, so keys remain pressed until a key_up event, while
+        one-shot actions (e.g. place_tower) are delivered to this tick only.
         
         Returns:
-            dict: Dictionary of user inputs by user_id
+            dict: Dictionary of user inputs by user_id, the held state merged with this tick's actions
         """
-        try:
-            # This is a stub implementation
-            # In a real implementation, this would fetch inputs from Redis pubsub
-            # or another message queue system
+        actions = {}
+        
+        while True:
+            try:
+                user_id, input_data = self._input_queue.get_nowait()
+            except queue.Empty:
+                break
             
-            # For now, just return the current user_inputs dictionary
-            with self.input_lock:
-                # Return a copy to avoid modification during iteration
-                return self.user_inputs.copy()
-        except Exception as e:
-            logger.error(f"Error getting user inputs for game {self.game_id}: {str(e)}")
-            return {}
+            self._merge_input(actions, user_id, input_data)
+        
+        user_inputs = {user_id: dict(state) for user_id, state in self._user_inputs.items()}
+        for user_id, user_actions in actions.items():
+            user_inputs.setdefault(user_id, {}).update(user_actions)
+        
+        return user_inputs
     
-    def process_user_input(self, user_id: int, input_data: Dict[str, Any]):
+    def _merge_input(self, actions: Dict[int, Dict[str, Any]], user_id: int, input_data: Dict[str, Any]):
         """
-        Process user input received from client.
-        This method would be called when input is received from Redis pubsub.
+        Merge one input message into the user's persistent input state and the
+        one-shot actions collected for this tick.
         
         Args:
+            actions: Dictionary of one-shot actions by user_id being built for this tick
             user_id: ID of the user who sent the input
             input_data: Dictionary containing input data (keys, mouse, etc.)
         """
         try:
-            with self.input_lock:
-                # Store the input data for the user
-                if user_id not in self.user_inputs:
-                    self.user_inputs[user_id] = {}
-                
-                # Update the user's input data
-                # This might include key states, mouse position, button clicks, etc.
-                self.user_inputs[user_id].update(input_data)
-                
-                # Handle key up events by removing keys that are no longer pressed
-                if 'key_up' in input_data:
-                    for key in input_data['key_up']:
-                        if 'keys' in self.user_inputs[user_id] and key in self.user_inputs[user_id]['keys']:
-                            self.user_inputs[user_id]['keys'].remove(key)
-                
-                logger.debug(f"Processed input from user {user_id} for game {self.game_id}: {input_data}")
+            state = self._user_inputs.setdefault(user_id, {})
+            
+            for name, value in input_data.items():
+                if name in PERSISTENT_INPUTS:
+                    # Copy the key list so key_up below never mutates the received message
+                    state[name] = list(value) if name == 'keys' else value
+                else:
+                    actions.setdefault(user_id, {})[name] = value
+            
+            # Handle key up events by removing keys that are no longer pressed
+            if 'key_up' in input_data and 'keys' in state:
+                for key in input_data['key_up']:
+                    if key in state['keys']:
+                        state['keys'].remove(key)
         except Exception as e:
             logger.error(f"Error processing user input for game {self.game_id}, user {user_id}: {str(e)}")
     
-    def _send_game_state_update(self):
+    def process_user_input(self, user_id: int, input_data: Dict[str, Any]):
         """
-        Send game state update to clients via WebSocket.
+        Queue user input received from client for the next tick.
+        Called by the game input subscriber when input arrives on the game's Redis channel.
+        
+        Args:
+            user_id: ID of the user who sent the input
+            input_data: Dictionary containing input data (keys, mouse, etc.)
+        """
+        self._input_queue.put_nowait((user_id, input_data))
+        logger.debug("Queued input from user %s for game %s: %s", user_id, self.game_id, input_data)
+    
+    def _build_game_state(self) -> Dict[str, Any]:
+        """
+        Build the game state payload sent to clients.
         
         This is a basic implementation that sends the minimal required fields.
         Game implementations should override this method if they need to send
         additional or different state information.
         """
+        game_state = self.game_state
+        return build_game_state(game_state.status, game_state.resources, game_state.progress, game_state.time_remaining)
+    
+    def _build_elements(self) -> Optional[list]:
+        """
+        Build the list of game elements sent to clients with each tick update.
+        
+        Games without elements return None so no list is sent. Game
+        implementations with towers, enemies, etc. should override this method.
+        """
+        return None
+    
+    def _send_game_state_update(self):
+        """
+        Send a game state update on its own, e.g. when the game ends or errors.
+        """
         try:
-            # Extract common fields with safe defaults
-            status = self.game_state.get('status', 'active')
-            resources = self.game_state.get('resources', {})
-            progress = self.game_state.get('progress', 0)  # Generic progress indicator
-            time_remaining = self.game_state.get('time_remaining')
-            
-            send_game_state_update(
-                self.game_id,
-                status,
-                resources,
-                progress,
-                time_remaining
-            )
+            send_tick_update(self.game_id, game_state=self._build_game_state())
         except Exception as e:
             logger.error(f"Error sending game state update for {self.game_id}: {str(e)}")
+    
+    def _send_tick_update(self):
+        """
+        Send the game state and elements for the current tick as one message.
+        
+        Elements are sent as a delta against the previous update, with the
+        full list sent every ELEMENTS_KEYFRAME_INTERVAL updates (starting with
+        the first) so clients that missed a sequence number can resync.
+        
+        The game state is left out of delta updates when it is unchanged since
+        the last update, and nothing is sent at all if neither it nor the
+        elements changed. Keyframes always carry the game state, so a client
+        resyncing from one also recovers state it missed.
+        """
+        try:
+            full_game_state = self._build_game_state()
+            elements = self._build_elements()
+            
+            game_state = full_game_state
+            encoded_game_state = orjson.dumps(full_game_state)
+            if encoded_game_state == self.sent_game_state:
+                game_state = None
+            else:
+                self.sent_game_state = encoded_game_state
+            
+            if elements is None:
+                if game_state is not None:
+                    send_tick_update(self.game_id, game_state=game_state)
+            else:
+                elements_delta, self.sent_elements = diff_elements(self.sent_elements, elements)
+                
+                if self.elements_seq % ELEMENTS_KEYFRAME_INTERVAL == 0:
+                    send_tick_update(self.game_id, game_state=full_game_state, elements=elements, seq=self.elements_seq)
+                elif game_state is None and not any(elements_delta.values()):
+                    # Nothing changed, so skip the update without using up a sequence number
+                    return
+                else:
+                    send_tick_update(self.game_id, game_state=game_state, elements_delta=elements_delta, seq=self.elements_seq)
+                
+                self.elements_seq += 1
+        except Exception as e:
+            logger.error(f"Error sending tick update for {self.game_id}: {str(e)}")
@@ -2,42 +2,47 @@
 Tower Defense Game Process - Implementation of tower defense game logic
 """
 import logging
-import time
 import random
+from dataclasses import dataclass
 from uuid import UUID
 from typing import Dict, Any, List
 
-from worker.src.games.base_game import BaseGameProcess
-from gameengine.src.websocket_messaging import send_elements_update, send_game_state_update
+from worker.src.games.base_game import BaseGameProcess, GameState
+from gameengine.src.websocket_messaging import build_game_state
 
 logger = logging.getLogger(__name__)
 
+@dataclass(slots=True)
+class TowerDefenseState(GameState):
+    """Game state with tower defense specific fields"""
+    wave: int = 0  # Current wave number
+
 class GameProcess(BaseGameProcess):
     """
     Tower Defense game implementation.
     This is a simple example implementation that simulates a tower defense game.
     """
     
+    game_state_class = TowerDefenseState
+    
     def __init__(self, game_id: UUID, game_data: Dict[str, Any]):
         super().__init__(game_id, game_data)
         # Tower defense specific variables
         self.towers = []
-        self.enemies = []
-        self.wave_timer = 0
+        self.tower_index = {}  # Tower ID to its position in self.towers
+        self.towers_placed = 0  # Used for tower IDs, so IDs are never reused after a sale
+        self.enemies = []  # Only active enemies; escaped and defeated ones are removed each tick
+        self.tower_targets = {}  # Tower ID to its current target, kept until the target dies or leaves range
         self.wave_interval = self.game_settings.get('wave_interval', 30)  # seconds between waves
         self.max_waves = self.game_settings.get('max_waves', 10)
         
-        # Extend the base game state with tower defense specific state
-        self.game_state.update({
-            'resources': {
-                'lives': self.game_settings.get('starting_lives', 20),
-                'money': self.game_settings.get('starting_money', 100),
-                'score': 0
-            },
-            'wave': 0,  # Current wave number
-            'time_remaining': self.wave_interval,
-            'progress': 0  # Will be calculated as current_wave / max_waves
-        })
+        # Set up the tower defense starting state; progress is calculated as current_wave / max_waves
+        self.game_state.resources = {
+            'lives': self.game_settings.get('starting_lives', 20),
+            'money': self.game_settings.get('starting_money', 100),
+            'score': 0
+        }
+        self.game_state.time_remaining = self.wave_interval  # Counts down to the next wave
         
         logger.info(f"Initialized Tower Defense game {self.game_id} with wave interval: {self.wave_interval}s")
     
@@ -46,8 +51,7 @@ class GameProcess(BaseGameProcess):
         logger.info(f"Initializing Tower Defense game {self.game_id}")
         
         # Game state is already initialized in __init__
-        # Just send initial elements update (empty at start)
-        self._send_elements_update()
+        # The base loop sends the initial state and (empty) elements together
     
     def _process_game_tick(self, user_inputs: Dict[int, Dict[str, Any]]):
         """
@@ -59,13 +63,12 @@ class GameProcess(BaseGameProcess):
         # Process user inputs (e.g., tower placement, upgrades)
         self._process_user_inputs(user_inputs)
         
-        # Update wave timer based on the game tick rate
-        self.wave_timer += self.game_tick_rate
-        self.game_state['time_remaining'] = max(0, self.wave_interval - (self.wave_timer % self.wave_interval))
+        # Count down to the next wave by the game tick rate
+        self.game_state.time_remaining -= self.game_tick_rate
         
         # Check if it's time for a new wave
-        if self.wave_timer >= self.wave_interval:
-            self.wave_timer = 0
+        if self.game_state.time_remaining <= 0:
+            self.game_state.time_remaining = self.wave_interval
             self._start_new_wave()
         
         # Process enemy movement
@@ -76,79 +79,99 @@ class GameProcess(BaseGameProcess):
         
         # Update progress indicator (for UI progress bars, etc.)
         if self.max_waves > 0:
-            self.game_state['progress'] = min(100, int((self.game_state['wave'] / self.max_waves) * 100))
+            self.game_state.progress = min(100, int((self.game_state.wave / self.max_waves) * 100))
         
         # Check game end conditions
         self._check_game_end_conditions()
         
-        # Send elements update based on frames_per_second
-        # This is now handled by the base class's update interval logic
-        current_time = time.time()
-        time_since_last_update = current_time - self.last_update_time
-        
-        if time_since_last_update >= self.update_interval:
-            self._send_elements_update()
+        # Elements are sent with the game state by the base class's tick update,
+        # based on frames_per_second
     
     def _start_new_wave(self):
         """Start a new wave of enemies"""
-        self.game_state['wave'] += 1
-        wave_num = self.game_state['wave']
+        self.game_state.wave += 1
+        wave_num = self.game_state.wave
         
         logger.info(f"Starting wave {wave_num} for game {self.game_id}")
         
         # Don't spawn more waves if we've reached the maximum
         if wave_num > self.max_waves:
-            if self.game_state['status'] != 'won':
-                self.game_state['status'] = 'won'
+            if self.game_state.status != 'won':
+                self.game_state.status = 'won'
                 logger.info(f"Game {self.game_id} won - all waves completed")
             return
         
         # Spawn enemies based on wave number
         num_enemies = 5 + (wave_num * 2)  # More enemies each wave
         
-        for i in range(num_enemies):
-            enemy = {
+        # Every enemy in a wave shares the same stats, so work them out once
+        health = 50 + (wave_num * 10)
+        speed = 2 + (wave_num * 0.2)
+        value = 10 + wave_num
+        
+        self.enemies.extend(
+            {
                 'id': f"enemy_{wave_num}_{i}",
                 'type': 'enemy',
                 'position': {'x': 0, 'y': random.randint(50, 450)},
                 'state': 'active',
                 'properties': {
-                    'health': 50 + (wave_num * 10),
-                    'speed': 2 + (wave_num * 0.2),
-                    'value': 10 + wave_num
+                    'health': health,
+                    'speed': speed,
+                    'value': value
                 }
             }
-            self.enemies.append(enemy)
+            for i in range(num_enemies)
+        )
     
     def _move_enemies(self):
         """Move all active enemies"""
-        enemies_to_remove = []
+        remaining_enemies = []
         
         for enemy in self.enemies:
-            if enemy['state'] != 'active':
-                continue
-                
             # Move enemy to the right
             enemy['position']['x'] += enemy['properties']['speed']
             
             # Check if enemy reached the end
             if enemy['position']['x'] > 800:  # Assuming 800px is the right edge
-                # Player loses a life
-                self.game_state['resources']['lives'] -= 1
-                enemies_to_remove.append(enemy)
+                # Player loses a life. Mark the enemy so a tower still holding it
+                # as its cached target drops it instead of shooting a ghost
+                self.game_state.resources['lives'] -= 1
+                enemy['state'] = 'escaped'
+            else:
+                remaining_enemies.append(enemy)
         
-        # Remove enemies that reached the end
-        for enemy in enemies_to_remove:
-            self.enemies.remove(enemy)
+        # Drop enemies that reached the end in one pass instead of removing them one by one
+        self.enemies = remaining_enemies
     
     def _process_tower_attacks(self):
         """Process tower attacks on enemies"""
+        if not self.towers or not self.enemies:
+            return
+        
+        # Bucket enemies into a grid with cells as wide as the longest tower range,
+        # so each tower only checks the few cells its range overlaps
+        cell_size = max(max(tower['properties'].get('range', 100) for tower in self.towers), 1)
+        enemy_grid = None  # Built on first use, since most towers keep their target
+        enemies_defeated = False
+        
         for tower in self.towers:
             if tower['state'] != 'active':
                 continue
+            
+            # Keep attacking the previous target while it is alive and in range
+            target = self.tower_targets.get(tower['id'])
+            
+            if target is None or not self._is_target_in_range(tower, target):
+                # Find closest enemy in range
+                if enemy_grid is None:
+                    enemy_grid = self._build_enemy_grid(cell_size)
+                target = self._find_target_for_tower(tower, enemy_grid, cell_size)
                 
-            # Find closest enemy in range
-            target = self._find_target_for_tower(tower)
+                if target:
+                    self.tower_targets[tower['id']] = target
+                else:
+                    self.tower_targets.pop(tower['id'], None)
             
             if target:
                 # Attack the enemy
@@ -160,48 +183,102 @@ class GameProcess(BaseGameProcess):
                     target['state'] = 'defeated'
                     
                     # Award money and score
-                    self.game_state['resources']['money'] += target['properties']['value']
-                    self.game_state['resources']['score'] += target['properties']['value']
-                    
-                    # Remove defeated enemy
-                    self.enemies.remove(target)
+                    self.game_state.resources['money'] += target['properties']['value']
+                    self.game_state.resources['score'] += target['properties']['value']
+                    enemies_defeated = True
+        
+        # Remove defeated enemies in one pass once every tower has attacked
+        if enemies_defeated:
+            self.enemies = [enemy for enemy in self.enemies if enemy['state'] == 'active']
     
-    def _find_target_for_tower(self, tower):
-        """Find the closest enemy in range for a tower"""
+    def _is_target_in_range(self, tower, enemy):
+        """Check whether an enemy is still active and within a tower's range"""
+        if enemy['state'] != 'active':
+            return False
+        
         tower_range = tower['properties'].get('range', 100)
-        tower_x = tower['position']['x']
-        tower_y = tower['position']['y']
+        dx = tower['position']['x'] - enemy['position']['x']
+        dy = tower['position']['y'] - enemy['position']['y']
         
-        closest_enemy = None
-        closest_distance = float('inf')
+        return dx * dx + dy * dy <= tower_range * tower_range
+    
+    def _build_enemy_grid(self, cell_size):
+        """
+        Bucket active enemies by grid cell
+        
+        Args:
+            cell_size: Width and height of each grid cell
+            
+        Returns:
+            dict: Lists of enemies keyed by (cell_x, cell_y)
+        """
+        enemy_grid = {}
         
         for enemy in self.enemies:
             if enemy['state'] != 'active':
                 continue
-                
-            enemy_x = enemy['position']['x']
-            enemy_y = enemy['position']['y']
-            
-            # Calculate distance
-            distance = ((tower_x - enemy_x) ** 2 + (tower_y - enemy_y) ** 2) ** 0.5
             
-            if distance <= tower_range and distance < closest_distance:
-                closest_enemy = enemy
-                closest_distance = distance
+            position = enemy['position']
+            cell = (int(position['x'] // cell_size), int(position['y'] // cell_size))
+            enemy_grid.setdefault(cell, []).append(enemy)
+        
+        return enemy_grid
+    
+    def _find_target_for_tower(self, tower, enemy_grid, cell_size):
+        """
+        Find the closest enemy in range for a tower
+        
+        Args:
+            tower: The tower looking for a target
+            enemy_grid: Active enemies bucketed by _build_enemy_grid()
+            cell_size: Cell size the grid was built with
+        """
+        tower_range = tower['properties'].get('range', 100)
+        tower_range_sq = tower_range * tower_range
+        tower_x = tower['position']['x']
+        tower_y = tower['position']['y']
+        
+        closest_enemy = None
+        closest_distance_sq = float('inf')
+        
+        # Only the cells overlapping the tower's range can hold enemies in range
+        min_cell_x = int((tower_x - tower_range) // cell_size)
+        max_cell_x = int((tower_x + tower_range) // cell_size)
+        min_cell_y = int((tower_y - tower_range) // cell_size)
+        max_cell_y = int((tower_y + tower_range) // cell_size)
+        
+        for cell_x in range(min_cell_x, max_cell_x + 1):
+            for cell_y in range(min_cell_y, max_cell_y + 1):
+                for enemy in enemy_grid.get((cell_x, cell_y), ()):
+                    # Enemies defeated earlier this tick are still in the grid
+                    if enemy['state'] != 'active':
+                        continue
+                        
+                    enemy_position = enemy['position']
+                    
+                    # Compare squared distances to avoid a square root per enemy
+                    dx = tower_x - enemy_position['x']
+                    dy = tower_y - enemy_position['y']
+                    distance_sq = dx * dx + dy * dy
+                    
+                    if distance_sq <= tower_range_sq and distance_sq < closest_distance_sq:
+                        closest_enemy = enemy
+                        closest_distance_sq = distance_sq
         
         return closest_enemy
     
     def _check_game_end_conditions(self):
         """Check if the game has ended"""
         # Check if player has lost all lives
-        if self.game_state['resources']['lives'] <= 0:
-            self.game_state['status'] = 'lost'
+        if self.game_state.resources['lives'] <= 0:
+            self.game_state.status = 'lost'
             logger.info(f"Game {self.game_id} lost - no lives remaining")
             self.running = False
-        
-        # Check if all waves are complete and no enemies left
-        if self.game_state['wave'] >= self.max_waves and not self.enemies:
-            self.game_state['status'] = 'won'
+        # Otherwise check if all waves are complete and no enemies left. Defeated and
+        # escaped enemies are removed every tick, so an empty list means none are active,
+        # and checking it first skips the wave lookup while a wave is in progress
+        elif not self.enemies and self.game_state.wave >= self.max_waves:
+            self.game_state.status = 'won'
             logger.info(f"Game {self.game_id} won - all waves completed")
             self.running = False
     
@@ -232,9 +309,10 @@ class GameProcess(BaseGameProcess):
         """Place a new tower"""
         # Check if the user has enough money
         tower_cost = tower_data.get('cost', 50)
-        if self.game_state['resources']['money'] >= tower_cost:
+        if self.game_state.resources['money'] >= tower_cost:
             # Create a new tower
-            tower_id = f"tower_{len(self.towers) + 1}"
+            self.towers_placed += 1
+            tower_id = f"tower_{self.towers_placed}"
             tower = {
                 'id': tower_id,
                 'type': 'tower',
@@ -250,76 +328,79 @@ class GameProcess(BaseGameProcess):
             }
             
             # Add the tower to the game
+            self.tower_index[tower_id] = len(self.towers)
             self.towers.append(tower)
             
             # Deduct the cost from the player's money
-            self.game_state['resources']['money'] -= tower_cost
+            self.game_state.resources['money'] -= tower_cost
             
             logger.info(f"User {user_id} placed tower {tower_id} in game {self.game_id}")
     
     def _upgrade_tower(self, user_id: int, tower_id: str):
         """Upgrade an existing tower"""
         # Find the tower
-        for tower in self.towers:
-            if tower['id'] == tower_id and tower['owner_id'] == user_id:
-                # Calculate upgrade cost (increases with level)
-                upgrade_cost = 25 * tower['properties']['level']
-                
-                # Check if the user has enough money
-                if self.game_state['resources']['money'] >= upgrade_cost:
-                    # Upgrade the tower
-                    tower['properties']['level'] += 1
-                    tower['properties']['damage'] *= 1.5  # 50% damage increase
-                    tower['properties']['range'] *= 1.2   # 20% range increase
-                    
-                    # Deduct the cost from the player's money
-                    self.game_state['resources']['money'] -= upgrade_cost
-                    
-                    logger.info(f"User {user_id} upgraded tower {tower_id} to level {tower['properties']['level']} in game {self.game_id}")
-                break
+        index = self.tower_index.get(tower_id)
+        if index is None or self.towers[index]['owner_id'] != user_id:
+            return
+        
+        tower = self.towers[index]
+        
+        # Calculate upgrade cost (increases with level)
+        upgrade_cost = 25 * tower['properties']['level']
+        
+        # Check if the user has enough money
+        if self.game_state.resources['money'] >= upgrade_cost:
+            # Upgrade the tower
+            tower['properties']['level'] += 1
+            tower['properties']['damage'] *= 1.5  # 50% damage increase
+            tower['properties']['range'] *= 1.2   # 20% range increase
+            
+            # Deduct the cost from the player's money
+            self.game_state.resources['money'] -= upgrade_cost
+            
+            logger.info(f"User {user_id} upgraded tower {tower_id} to level {tower['properties']['level']} in game {self.game_id}")
     
     def _sell_tower(self, user_id: int, tower_id: str):
         """Sell an existing tower"""
         # Find the tower
-        for i, tower in enumerate(self.towers):
-            if tower['id'] == tower_id and tower['owner_id'] == user_id:
-                # Calculate sell value (50% of total investment)
-                base_cost = 50  # Base tower cost
-                upgrade_costs = sum(25 * level for level in range(1, tower['properties']['level']))
-                sell_value = int((base_cost + upgrade_costs) * 0.5)
-                
-                # Remove the tower
-                self.towers.pop(i)
-                
-                # Add the sell value to the player's money
-                self.game_state['resources']['money'] += sell_value
-                
-                logger.info(f"User {user_id} sold tower {tower_id} for {sell_value} in game {self.game_id}")
-                break
+        index = self.tower_index.get(tower_id)
+        if index is None or self.towers[index]['owner_id'] != user_id:
+            return
+        
+        tower = self.towers[index]
+        
+        # Calculate sell value (50% of total investment); upgrades cost 25 * level
+        # for each level below the current one, which sums to 25 * L * (L - 1) / 2
+        base_cost = 50  # Base tower cost
+        level = tower['properties']['level']
+        upgrade_costs = 25 * level * (level - 1) // 2
+        sell_value = int((base_cost + upgrade_costs) * 0.5)
+        
+        # Remove the tower by moving the last tower into its slot
+        last_tower = self.towers.pop()
+        if last_tower is not tower:
+            self.towers[index] = last_tower
+            self.tower_index[last_tower['id']] = index
+        del self.tower_index[tower_id]
+        self.tower_targets.pop(tower_id, None)
+        
+        # Add the sell value to the player's money
+        self.game_state.resources['money'] += sell_value
+        
+        logger.info(f"User {user_id} sold tower {tower_id} for {sell_value} in game {self.game_id}")
     
-    def _send_elements_update(self):
-        """Send game elements update to clients via WebSocket"""
-        try:
-            # Combine towers and enemies into a single list
-            elements = self.towers + [e for e in self.enemies if e['state'] == 'active']
-            
-            # Send the update
-            send_elements_update(self.game_id, elements)
-        except Exception as e:
-            logger.error(f"Error sending elements update for {self.game_id}: {str(e)}")
+    def _build_elements(self) -> List[Dict[str, Any]]:
+        """Combine towers and active enemies into the element list sent to clients"""
+        return self.towers + self.enemies
     
-    def _send_game_state_update(self):
+    def _build_game_state(self) -> Dict[str, Any]:
         """
         Override the base method to send tower defense specific state updates
         that include wave information instead of generic progress.
         """
-        try:
-            send_game_state_update(
-                self.game_id,
-                self.game_state['status'],
-                self.game_state['resources'],
-                self.game_state['wave'],  # Send wave instead of generic progress
-                self.game_state.get('time_remaining')
-            )
-        except Exception as e:
-            logger.error(f"Error sending game state update for {self.game_id}: {str(e)}")
+        return build_game_state(
+            self.game_state.status,
+            self.game_state.resources,
+            self.game_state.wave,  # Send wave instead of generic progress
+            self.game_state.time_remaining
+        )
@@ -1,6 +1,6 @@
 import asyncio
-import json
 import datetime
+import time
 from channels.layers import get_channel_layer
 from channels.consumer import AsyncConsumer
 from gameengine.src.channel_groups import get_game_group_name
@@ -23,8 +23,9 @@ class SimulationConsumer(AsyncConsumer):
         if game_id not in self.simulations:
             self.simulations[game_id] = {
                 'entities': {},
+                'elements': {},  # Entity ID to its element as sent to clients
                 'time': 0,
-                'last_update': str(datetime.datetime.now()),
+                'last_update_ns': time.time_ns(),  # Formatted only when state is reported
                 'game_id': game_id,
                 'settings': event.get('settings', {})
             }
@@ -64,8 +65,28 @@ class SimulationConsumer(AsyncConsumer):
             return
             
         self.simulations[game_id]['entities'][entity_id] = entity_data
+        self.simulations[game_id]['elements'][entity_id] = self.build_element(entity_id, entity_data)
         print(f"Updated entity {entity_id} in game {game_id}")
 
+    async def update_entities(self, event):
+        """Update several entities in the simulation from one message"""
+        game_id = event.get('game_id')
+        entities = event.get('entities', {})
+        
+        if not game_id:
+            print("Error: No game_id provided")
+            return
+            
+        if game_id not in self.simulations:
+            print(f"Error: Game {game_id} not found")
+            return
+            
+        self.simulations[game_id]['entities'].update(entities)
+        self.simulations[game_id]['elements'].update(
+            (entity_id, self.build_element(entity_id, entity)) for entity_id, entity in entities.items()
+        )
+        print(f"Updated {len(entities)} entities in game {game_id}")
+
     async def update_settings(self, event):
         """Update simulation settings"""
         game_id = event.get('game_id')
@@ -82,6 +103,25 @@ class SimulationConsumer(AsyncConsumer):
         self.simulations[game_id]['settings'] = settings
         print(f"Updated settings for game {game_id}")
 
+    @staticmethod
+    def build_element(entity_id, entity):
+        """Build the element sent to clients for an entity, once per entity update
+        
+        The element shares the entity's position list and properties dict, so the
+        simulation loop's in-place moves show up without rebuilding it every report.
+        """
+        if 'position' in entity:
+            entity['position'] = list(entity['position'])
+        entity.setdefault('properties', {})
+        
+        return {
+            'id': entity_id,
+            'type': entity.get('type', 'unknown'),
+            'position': entity.get('position', [0, 0]),
+            'state': entity.get('state', 'active'),
+            'properties': entity['properties']
+        }
+
     async def run_simulation(self, game_id):
         """Run the simulation loop - our long-running process"""
         channel_layer = get_channel_layer()
@@ -94,58 +134,39 @@ class SimulationConsumer(AsyncConsumer):
                 
                 # Update simulation time
                 sim_state['time'] += 1
-                sim_state['last_update'] = str(datetime.datetime.now())
+                sim_state['last_update_ns'] = time.time_ns()
 
                 # Update entities based on simulation rules
                 for entity_id, entity in list(sim_state['entities'].items()):
                     # Example: move entities
                     if 'position' in entity and 'velocity' in entity:
-                        entity['position'] = [
-                            entity['position'][0] + entity['velocity'][0],
-                            entity['position'][1] + entity['velocity'][1]
-                        ]
+                        # Move in place so the entity's element sees the new position
+                        entity['position'][0] += entity['velocity'][0]
+                        entity['position'][1] += entity['velocity'][1]
 
                 # Report state periodically
                 if sim_state['time'] % 10 == 0:  # Every 10 time steps
-                    await channel_layer.group_send(
-                        game_group,
-                        {
-                            'type': 'game_state',
-                            'message_type': 'game_state',
-                            'game_state': {
-                                'status': 'active',
-                                'resources': {
-                                    'lives': sim_state.get('settings', {}).get('lives', 10),
-                                    'money': sim_state.get('settings', {}).get('money', 100),
-                                    'score': sim_state['time'] * 10  # Example score calculation
-                                },
-                                'wave': sim_state['time'] // 100 + 1,
-                                'time_remaining': 300 - (sim_state['time'] % 300)
+                    # Send the state and elements together as one tick update
+                    message = {
+                        'type': 'tick_update',
+                        'message_type': 'tick_update',
+                        'game_state': {
+                            'status': 'active',
+                            'resources': {
+                                'lives': sim_state.get('settings', {}).get('lives', 10),
+                                'money': sim_state.get('settings', {}).get('money', 100),
+                                'score': sim_state['time'] * 10  # Example score calculation
                             },
-                            'timestamp': sim_state['last_update']
-                        }
-                    )
+                            'wave': sim_state['time'] // 100 + 1,
+                            'time_remaining': 300 - (sim_state['time'] % 300)
+                        },
+                        'timestamp': str(datetime.datetime.fromtimestamp(sim_state['last_update_ns'] / 1e9))
+                    }
+                    
+                    if sim_state['elements']:
+                        message['list_items'] = list(sim_state['elements'].values())
                     
-                    # Also send elements update
-                    if sim_state['entities']:
-                        await channel_layer.group_send(
-                            game_group,
-                            {
-                                'type': 'elems_update',
-                                'message_type': 'elems_update',
-                                'list_items': [
-                                    {
-                                        'id': entity_id,
-                                        'type': entity.get('type', 'unknown'),
-                                        'position': entity.get('position', [0, 0]),
-                                        'state': entity.get('state', 'active'),
-                                        'properties': entity.get('properties', {})
-                                    }
-                                    for entity_id, entity in sim_state['entities'].items()
-                                ],
-                                'timestamp': sim_state['last_update']
-                            }
-                        )
+                    await channel_layer.group_send(game_group, message)
                     
                     print(f"Reported state for game {game_id} at time {sim_state['time']}")
 